@@ -5,6 +5,8 @@ Utilities to read and plot PXIe-5922 (NI_SCOPE) traces from Lyse HDF5 files.
 Main API:
 - set_grid(on: bool): enable/disable grid on plots.
 - plot_ni_scope_channels(h5_path, show=True): plot Ch0 and Ch1 on one figure.
+- read_ni_scope_trace(h5_path, ch=0): one channel in volts plus its time base.
+- time_axis_ms(timebase): build the time axis (ms) for a time base on demand.
 - quick_tree(h5_path): inspect HDF5 structure (for debugging).
 """
 
@@ -33,8 +35,22 @@ def _attrs(ds: h5py.Dataset) -> Dict[str, Any]:
     except Exception:
         return {}
 
-def _time_from_attrs(attrs: Dict[str, Any], n: int) -> Tuple[np.ndarray, str]:
-    """Generate time axis from dt/sample_rate attrs (ms if found)."""
+def _read_volts(ds: h5py.Dataset) -> np.ndarray:
+    """Read a trace dataset in volts, undoing int16 storage (code*gain + offset)."""
+    arr = ds[()]
+    attrs = _attrs(ds)
+    if "gain" not in attrs:
+        return arr
+    gain = np.asarray(attrs["gain"], dtype=float)
+    offset = np.asarray(attrs.get("offset", 0.0), dtype=float)
+    # one gain/offset per channel, channels along the second-to-last axis
+    if arr.ndim >= 2 and gain.ndim == 1:
+        gain = gain[:, None]
+        offset = offset[:, None] if offset.ndim == 1 else offset
+    return arr * gain + offset
+
+def _timebase(attrs: Dict[str, Any], n: int) -> Optional[Tuple[float, float, int]]:
+    """(t0_ms, dt_ms, n) from the dt/sample_rate/t0 attrs, or None if absent."""
     dt = None
     if "dt" in attrs:
         dt = float(attrs["dt"])
@@ -42,15 +58,26 @@ def _time_from_attrs(attrs: Dict[str, Any], n: int) -> Tuple[np.ndarray, str]:
         sr = float(attrs["sample_rate"])
         if sr > 0:
             dt = 1.0 / sr
-    t0 = float(attrs.get("t0", 0.0))
     if dt is None:
+        return None
+    t0 = float(attrs.get("t0", 0.0))
+    return t0 * 1000.0, dt * 1000.0, int(n)
+
+def time_axis_ms(timebase: Tuple[float, float, int]) -> np.ndarray:
+    """Build the time axis (ms) described by a (t0_ms, dt_ms, n) time base."""
+    t0_ms, dt_ms, n = timebase
+    return t0_ms + np.arange(n) * dt_ms
+
+def _time_from_attrs(attrs: Dict[str, Any], n: int) -> Tuple[np.ndarray, str]:
+    """Generate time axis from dt/sample_rate attrs (ms if found)."""
+    tb = _timebase(attrs, n)
+    if tb is None:
         return np.arange(n, dtype=float), "Sample #"
-    t = t0 + np.arange(n) * dt
-    return t * 1000.0, "Time (ms)"   # convert to ms
+    return time_axis_ms(tb), "Time (ms)"
 
 def _single_dataset(ds: h5py.Dataset) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, str]]:
     """Return (t, ch0, ch1, xlabel) if ds has both channels (2×N or N×2)."""
-    arr = ds[()]
+    arr = _read_volts(ds)
     if not (isinstance(arr, np.ndarray) and arr.ndim == 2 and 2 in arr.shape):
         return None
     vals = arr if arr.shape[0] == 2 else arr.T
@@ -89,6 +116,26 @@ def quick_tree(h5_path: str, max_rows: int = 3):
         f.visititems(_visit)
 
 
+def read_ni_scope_trace(h5_path: str, ch: int = 0) -> Tuple[np.ndarray, Optional[Tuple[float, float, int]]]:
+    """
+    Return (y, timebase) for one channel of the /data/traces NI_SCOPE dataset.
+
+    timebase is (t0_ms, dt_ms, n) from the dataset attrs, or None for shots
+    saved before the time base was stored. No time array is built here; use
+    time_axis_ms(timebase) when one is needed.
+    """
+    with h5py.File(h5_path, "r") as h5:
+        for key in ["data/traces/NI_SCOPE", "data/traces/ni_scope"]:
+            if key in h5 and isinstance(h5[key], h5py.Dataset):
+                ds = h5[key]
+                arr = _read_volts(ds)
+                if not (arr.ndim == 2 and 2 in arr.shape):
+                    break
+                vals = arr if arr.shape[0] == 2 else arr.T
+                return vals[ch], _timebase(_attrs(ds), vals.shape[1])
+    raise KeyError("Could not find NI_SCOPE trace dataset. Use quick_tree() to inspect file.")
+
+
 # ---------------- Main plotting function ----------------
 
 def plot_ni_scope_channels(h5_path: str, show: bool = True) -> Dict[str, np.ndarray]:
@@ -151,6 +198,7 @@ def ensure_time_ms(t, y, fs_hz=1_000_000):
     """
     NI_SCOPE.py returns ms if it can infer dt/sample_rate, otherwise returns sample index.
     Detect sample-index and convert to ms using assumed fs.
+    Only needed for shots saved before the worker stored the time base.
     """
     t = np.asarray(t, dtype=float)
     y = np.asarray(y, dtype=float)
@@ -175,6 +223,8 @@ def load_ni_scope_sequences(folder_path_day, seq_list, shot_indices=None, ch=0,
     shot_indices : array-like or None
         Specific shot indices to load (e.g. [0,2,5]).
         If None → load all shots.
+    fs_hz : float
+        Sample rate assumed only for old shots without time base attrs.
     """
 
     seq_list = np.atleast_1d(seq_list).astype(int).ravel().tolist()
@@ -204,6 +254,7 @@ def load_ni_scope_sequences(folder_path_day, seq_list, shot_indices=None, ch=0,
         shots = []
         used_files = []
         time_ref_ms = None
+        timebase_ref = None
 
         skip_counts = {"read_error": 0, "bad_shape": 0,
                        "time_mismatch": 0, "index_out_of_range": 0, "ok": 0}
@@ -218,29 +269,56 @@ def load_ni_scope_sequences(folder_path_day, seq_list, shot_indices=None, ch=0,
             h5_path = os.path.join(seq_folder, files[shot_idx])
 
             try:
-                out = plot_ni_scope_channels(h5_path, show=False)
-            except Exception as e:
+                y, timebase = read_ni_scope_trace(h5_path, ch=ch)
+            except KeyError:
+                timebase = None
+                y = None
+            except Exception:
                 skip_counts["read_error"] += 1
                 continue
 
-            if ch == 0:
-                t, y = out["t0"], out["y0"]
+            if timebase is not None:
+                # Compare (t0, dt, n) instead of building a time array per shot
+                if y.ndim != 1:
+                    skip_counts["bad_shape"] += 1
+                    continue
+                if time_ref_ms is not None:
+                    skip_counts["time_mismatch"] += 1
+                    continue
+                if timebase_ref is None:
+                    timebase_ref = timebase
+                elif not np.allclose(timebase, timebase_ref, rtol=0, atol=1e-12):
+                    skip_counts["time_mismatch"] += 1
+                    continue
             else:
-                t, y = out["t1"], out["y1"]
+                # Old shots: no time base attrs, fall back to guessing from fs_hz
+                if timebase_ref is not None:
+                    skip_counts["time_mismatch"] += 1
+                    continue
+                try:
+                    out = plot_ni_scope_channels(h5_path, show=False)
+                except Exception as e:
+                    skip_counts["read_error"] += 1
+                    continue
 
-            t_ms, y = ensure_time_ms(t, y, fs_hz=fs_hz)
+                if ch == 0:
+                    t, y = out["t0"], out["y0"]
+                else:
+                    t, y = out["t1"], out["y1"]
 
-            if t_ms.ndim != 1 or y.ndim != 1 or t_ms.size != y.size:
-                skip_counts["bad_shape"] += 1
-                continue
+                t_ms, y = ensure_time_ms(t, y, fs_hz=fs_hz)
 
-            if time_ref_ms is None:
-                time_ref_ms = t_ms
-            else:
-                if t_ms.size != time_ref_ms.size or not np.allclose(t_ms, time_ref_ms, rtol=0, atol=1e-12):
-                    skip_counts["time_mismatch"] += 1
+                if t_ms.ndim != 1 or y.ndim != 1 or t_ms.size != y.size:
+                    skip_counts["bad_shape"] += 1
                     continue
 
+                if time_ref_ms is None:
+                    time_ref_ms = t_ms
+                else:
+                    if t_ms.size != time_ref_ms.size or not np.allclose(t_ms, time_ref_ms, rtol=0, atol=1e-12):
+                        skip_counts["time_mismatch"] += 1
+                        continue
+
             shots.append(y.astype(float))
             used_files.append(files[shot_idx])
             skip_counts["ok"] += 1
@@ -249,6 +327,9 @@ def load_ni_scope_sequences(folder_path_day, seq_list, shot_indices=None, ch=0,
             print(f"Seq {seq}: no valid shots | skip_counts={skip_counts}")
             continue
 
+        if timebase_ref is not None:
+            time_ref_ms = time_axis_ms(timebase_ref)
+
         scope_seq_data[seq] = {
             "scope_time_ms": time_ref_ms,
             "scope_values": np.stack(shots),
@@ -1,4 +1,5 @@
 import lyse
+import h5py
 import numpy as np
 import matplotlib.pyplot as plt
 from pylab import *
@@ -168,7 +169,13 @@ if 'Absorption3' in trace_data:
 # # --- Third subplot for PMT (NI-5922) ---
 ax2 = fig.add_subplot(gs[1, 1])   # span both rows vertically
 voltages = run.get_trace('NI_SCOPE', raw_data = True)
-times_SCOPE=np.arange(len(voltages[0]))/1_000_000 #HARD CODED!!! REPLACE WITH SAVE/IMPORT!! -- Shungo
+with h5py.File(h5_path, 'r') as f:
+    scope_attrs = dict(f['data/traces/NI_SCOPE'].attrs)
+if 'gain' in scope_attrs: # int16 storage: scale ADC codes back to volts
+    voltages = voltages*scope_attrs['gain'][:, None] + scope_attrs['offset'][:, None]
+dt_SCOPE = float(scope_attrs.get('dt', 1/1_000_000)) # shots saved before the time base was stored were 1 MS/s
+t0_SCOPE = float(scope_attrs.get('t0', 0.0))
+times_SCOPE=t0_SCOPE + np.arange(len(voltages[0]))*dt_SCOPE
 times_SCOPE=times_SCOPE*1000 #s to ms
 ax2.plot(times_SCOPE, voltages[0],label='Ch0',alpha=0.5)
 # ax2.plot(times_SCOPE, voltages[1],label='Ch1',alpha=0.5)
@@ -4,6 +4,8 @@
 import lyse
 import numpy as np
 import matplotlib.pyplot as plt
+import h5py
+from user_devices.NuvuCamera.dark_frames import dark_corrected
 
 # Is this script being run from within an interactive lyse session?
 if lyse.spinning_top:
@@ -28,6 +30,15 @@ trace_data["Absorption3"] = run.get_trace("Absorption3") #added 08/07/2025
 
 #extract the image
 image_data = run.get_image("camera","fluorescence", "frame")
+# subtract the master dark frame if the shot has one (older shots are raw)
+with h5py.File(h5_path, 'r') as h5_file:
+    camera_group = h5_file["images/camera"]
+    if "dark_subtraction" in camera_group.attrs:
+        image_data = dark_corrected(camera_group, image_data)
+# place it on the sensor: [offset_x, offset_y, width, height] in unbinned pixels
+# (older shots were always full 512x512 frames)
+roi = run.get_attrs("images/camera").get("readout_roi", [0, 0, 512, 512])
+image_extent = [roi[0], roi[0] + roi[2], roi[1], roi[1] + roi[3]]
 
 fig = plt.figure(4, figsize=(10, 4))
 # Create a gridspec layout with 1 row and 2 columns, and set the width ratio
@@ -149,7 +160,7 @@ if 'Absorption3' in trace_data:
 # --- Third subplot (right side spanning both rows) for fluorescence image ---
 ax2 = fig.add_subplot(gs[:, 1])   # span both rows vertically
 ax2.imshow(image_data,
-           extent=[0, 512, 0, 512],
+           extent=image_extent,
            cmap='magma',
            vmin=1568,
            vmax=1700)
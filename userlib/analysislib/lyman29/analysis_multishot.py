@@ -6,6 +6,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import os
 import h5py
+from user_devices.NuvuCamera.accumulator import load_accumulated, shot_sidecar_path
 
 df = lyse.data()
 h5_path = df.filepath.iloc[-1]
@@ -43,7 +44,12 @@ for filename in os.listdir(folder_path):
             print(file_path)
         
 
-# image_data_nuvu = image_data_nuvu/count
+# Averaged image and noise map of the sequence, kept up to date by the camera
+# worker when the camera has accumulate=True (no need to reopen every shot)
+accumulated = load_accumulated(shot_sidecar_path(h5_path, "camera"))
+if ("fluorescence", "frame") in accumulated:
+    image_data_nuvu = accumulated["fluorescence", "frame"]["mean"]
+    noise_map_nuvu = accumulated["fluorescence", "frame"]["std"]
 # plt.clf()
 # plt.figure(2, figsize=(10, 4))
 # # Second subplot (top-right) - fluorescence image
@@ -0,0 +1,113 @@
+#####################################################################
+#                                                                   #
+# /NI_SCOPE/benchmark.py                                            #
+#                                                                   #
+# Drive NI_SCOPEWorker through many buffered/manual cycles against  #
+# the simulated session and report per-transition latency.          #
+#                                                                   #
+#   python -m user_devices.NI_SCOPE.benchmark --shots 200           #
+#                                                                   #
+# h5_lock needs a zlock server running, as for BLACS itself.        #
+#                                                                   #
+#####################################################################
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+import labscript_utils.h5_lock   # noqa: F401  (must come before h5py)
+import h5py
+
+from user_devices.NI_SCOPE.blacs_workers import NI_SCOPEWorker
+from user_devices.NI_SCOPE.mock_session import MockSession
+
+
+def make_worker(props, realtime=False):
+    """Build an NI_SCOPEWorker outside BLACS (no worker process) on a mock session."""
+    worker = NI_SCOPEWorker.__new__(NI_SCOPEWorker)
+    for k, v in props.items():
+        setattr(worker, k, v)
+    worker.mock = True
+    with contextlib.redirect_stdout(io.StringIO()):
+        worker.init()
+    # swap in a seeded session so runs are reproducible
+    worker.scope = MockSession(props['addr'], realtime=realtime, seed=0)
+    return worker
+
+
+def make_shot_file(path, device_name):
+    with h5py.File(path, 'w') as f:
+        f.require_group(f'/devices/{device_name}')
+
+
+def summarize(label, samples):
+    a = np.asarray(samples) * 1e3
+    print(f'{label:<24s} mean {a.mean():8.3f} ms   median {np.median(a):8.3f} ms   '
+          f'p95 {np.percentile(a, 95):8.3f} ms   max {a.max():8.3f} ms')
+
+
+def run(shots, props, realtime=False, verbose=False):
+    device_name = 'NI_SCOPE'
+    worker = make_worker(props, realtime=realtime)
+    timings = {'transition_to_buffered': [], 'transition_to_manual': [], 'cycle': []}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        h5_path = os.path.join(tmp, 'shot.h5')
+        make_shot_file(h5_path, device_name)
+        out = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with out:
+            for i in range(shots):
+                t0 = time.perf_counter()
+                worker.transition_to_buffered(device_name, h5_path, {}, i == 0)
+                t1 = time.perf_counter()
+                worker.transition_to_manual()
+                t2 = time.perf_counter()
+                timings['transition_to_buffered'].append(t1 - t0)
+                timings['transition_to_manual'].append(t2 - t1)
+                timings['cycle'].append(t2 - t0)
+        size = os.path.getsize(h5_path)
+
+    print(f'{shots} shots, {props["min_num_pts"]} pts x {worker.channel_count} ch, '
+          f'storage={props.get("storage_format", "float64")}, '
+          f'records={props.get("num_records", 1)}, realtime={realtime}, '
+          f'shot file {size / 1e6:.2f} MB')
+    for label, samples in timings.items():
+        summarize(label, samples)
+    print('worker phases (ms, rolling):')
+    for phase, st in worker.get_timing_stats().items():
+        print(f'  {phase:<22s} n {st["n"]:4d}   mean {st["mean"]:8.3f}   median {st["median"]:8.3f}   '
+              f'p95 {st["p95"]:8.3f}   max {st["max"]:8.3f}')
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='NI_SCOPEWorker mock benchmark')
+    parser.add_argument('--shots', type=int, default=100)
+    parser.add_argument('--num-pts', type=int, default=200_000)
+    parser.add_argument('--sample-rate', type=float, default=1_000_000)
+    parser.add_argument('--num-records', type=int, default=1)
+    parser.add_argument('--storage-format', choices=['float64', 'int16'], default='float64')
+    parser.add_argument('--stream-chunk-size', type=int, default=None)
+    parser.add_argument('--realtime', action='store_true',
+                        help='samples arrive at the sample rate instead of instantly')
+    parser.add_argument('--verbose', action='store_true', help='show worker prints')
+    args = parser.parse_args()
+
+    props = {
+        'addr': 'PXI1Slot2',
+        'vertical_range': [0.5, 0.1],
+        'vertical_coupling': ['DC', 'DC'],
+        'min_sample_rate': args.sample_rate,
+        'min_num_pts': args.num_pts,
+        'trigger_source': 'TRIG',
+        'trigger_level': 1.0,
+        'trigger_delay': 0.0,
+        'num_records': args.num_records,
+        'storage_format': args.storage_format,
+        'stream_chunk_size': args.stream_chunk_size,
+    }
+    run(args.shots, props, realtime=args.realtime, verbose=args.verbose)
@@ -8,11 +8,76 @@
 #                                                                   #
 #####################################################################
 
-from blacs.device_base_class import DeviceTab
+from qtutils.qt import QtWidgets
+import pyqtgraph as pg
+
+from blacs.device_base_class import DeviceTab, define_state, MODE_MANUAL
 
 class NI_SCOPETab(DeviceTab):
     def initialise_GUI(self):
-        pass
+        properties = self.settings['connection_table'].find_by_name(self.device_name).properties
+        self.preview_rate = float(properties.get('preview_rate') or 10.0)
+        self._preview_seq = 0
+        self._preview_frames = 0
+        self._preview_polls = 0
+
+        self.preview_check_box = QtWidgets.QCheckBox('Live preview (manual mode)')
+        self.preview_check_box.toggled.connect(self.on_preview_toggled)
+        self.preview_status = QtWidgets.QLabel('')
+
+        self.preview_plot = pg.PlotWidget()
+        self.preview_plot.setLabel('bottom', 'time after trigger', units='s')
+        self.preview_plot.setLabel('left', 'signal', units='V')
+        self.preview_plot.addLegend()
+        self.preview_curves = []
+        self.preview_plot.hide()
+
+        layout = self.get_tab_layout()
+        controls = QtWidgets.QHBoxLayout()
+        controls.addWidget(self.preview_check_box)
+        controls.addWidget(self.preview_status)
+        controls.addStretch()
+        layout.addLayout(controls)
+        layout.addWidget(self.preview_plot)
+
+    @define_state(MODE_MANUAL, True)
+    def on_preview_toggled(self, enabled):
+        # The poll interval matches the worker's frame rate limit, and each
+        # frame is already decimated, so GUI cost is independent of record length
+        interval_ms = max(1, int(1000 / self.preview_rate))
+        self.statemachine_timeout_remove(self.update_preview)
+        if enabled:
+            ok = yield(self.queue_work(self.primary_worker, 'start_preview'))
+            if not ok:
+                self.preview_status.setText('preview failed to start, see worker output')
+                return
+            self.preview_plot.show()
+            self.statemachine_timeout_add(interval_ms, self.update_preview)
+        else:
+            yield(self.queue_work(self.primary_worker, 'stop_preview'))
+            self.preview_plot.hide()
+            self.preview_status.setText('')
+
+    @define_state(MODE_MANUAL, True)
+    def update_preview(self):
+        frame = yield(self.queue_work(self.primary_worker, 'get_preview_frame', self._preview_seq))
+        self._preview_polls += 1
+        if frame is None:
+            return
+        self._preview_seq = frame['seq']
+        self._preview_frames += 1
+        y = frame['y']
+        while len(self.preview_curves) < len(y):
+            ch = len(self.preview_curves)
+            self.preview_curves.append(
+                self.preview_plot.plot(pen=pg.intColor(ch, hues=max(2, len(y))), name=f'ch{ch}')
+            )
+        for curve, trace in zip(self.preview_curves, y):
+            curve.setData(frame['t'], trace)
+        self.preview_status.setText(
+            f"frame {frame['seq']}, acquire {1e3 * frame['acquire_time']:.0f} ms, "
+            f"{self._preview_frames}/{self._preview_polls} polls updated"
+        )
 
     def initialise_workers(self):
         worker_initialisation_kwargs = self.connection_table.find_by_name(self.device_name).properties
@@ -276,18 +276,72 @@
 #                                                                   #
 #####################################################################
 
+import collections
+import contextlib
+import threading
+import time
 import numpy as np
 import labscript_utils.h5_lock   # noqa: F401  (keeps h5py thread-safe under labscript)
 import h5py
 import niscope
 from blacs.tab_base_classes import Worker
 import labscript_utils.properties
+from .mock_session import MockSession, FetchTimeout
+
+# NI-SCOPE's "Maximum time exceeded before the operation completed" error
+# (0xBFFA2003), what a fetch of samples not yet acquired fails with
+MAX_TIME_EXCEEDED = -1074126845
+
+
+def _fetch_timed_out(e):
+    return isinstance(e, FetchTimeout) or getattr(e, 'code', None) == MAX_TIME_EXCEEDED
 
 
 class NI_SCOPEWorker(Worker):
+    # Properties that determine the driver configuration. If none of these change
+    # between shots the previous horizontal/trigger/vertical setup is reused.
+    config_keys = (
+        'min_sample_rate',
+        'min_num_pts',
+        'num_records',
+        'trigger_source',
+        'trigger_level',
+        'trigger_delay',
+        'trigger_slope',
+        'trigger_coupling',
+        'vertical_range',
+        'vertical_coupling',
+    )
+    # How long a streaming fetch waits for its chunk before re-checking for stop
+    stream_poll_timeout = 0.1
+    # Manual-mode live preview: at most preview_rate frames/s, each channel
+    # reduced to preview_points min/max pairs (both overridable from the
+    # connection table)
+    preview_rate = 10.0
+    preview_points = 1000
+    # Number of recent shots the rolling phase timing statistics cover
+    timing_window = 100
+
     def init(self):
-        # Create the NI-SCOPE session
-        self.scope = niscope.Session(self.addr)
+        # Create the NI-SCOPE session (or a simulated one, no hardware needed)
+        if getattr(self, 'mock', False):
+            self.scope = MockSession(self.addr)
+        else:
+            self.scope = niscope.Session(self.addr)
+        self._applied_config = None
+        self.config_reused = False
+        self._fetch_buffer = None
+        self._stream_thread = None
+        self._stream_stop = threading.Event()
+        self._preview_enabled = False
+        self._preview_thread = None
+        self._preview_stop = threading.Event()
+        self._preview_lock = threading.Lock()
+        self._preview_frame = None
+        self._shot_timing = {}
+        self._timing_history = collections.defaultdict(
+            lambda: collections.deque(maxlen=int(self.timing_window))
+        )
 
         mfg = self.scope.instrument_manufacturer
         model = self.scope.instrument_model
@@ -308,16 +362,346 @@ class NI_SCOPEWorker(Worker):
         return mapping.get(key, niscope.VerticalCoupling.DC)
 
     # ---------- helpers ----------
+    def _config_fingerprint(self):
+        """Snapshot of everything the driver configuration depends on."""
+        return tuple(repr(getattr(self, k, None)) for k in self.config_keys)
+
+    def _get_fetch_buffer(self, num_pts, dtype=np.float64, num_records=1):
+        """Return the persistent [records, channels, samples] fetch buffer,
+        reallocating only when its shape or dtype changes."""
+        shape = (num_records, self.channel_count, num_pts)
+        buf = self._fetch_buffer
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            print(f'[NI_SCOPE] Allocating fetch buffer {shape} {np.dtype(dtype).name}')
+            self._fetch_buffer = np.empty(shape, dtype=dtype)
+        return self._fetch_buffer
+
+    def _fetch_all_channels(self, num_pts, dtype=np.float64, num_records=1):
+        """Fetch the first num_pts samples of every channel and record in a
+        single driver call, straight into the persistent buffer (no
+        per-channel copies). Returns a [records, channels, samples] view.
+
+        With an integer dtype the driver returns unscaled ADC codes; the
+        per-channel gain/offset (volts = code*gain + offset) are returned too.
+        """
+        data = self._get_fetch_buffer(num_pts, dtype, num_records)
+        channels = ','.join(str(i) for i in range(self.channel_count))
+        # fetch_into wants a flat array; ravel() of the C-contiguous buffer is a view.
+        # The driver fills it record by record, channels within each record.
+        wfm_infos = self.scope.channels[channels].fetch_into(
+            data.ravel(), record_number=0, num_records=num_records
+        )
+        print(f'[NI_SCOPE] Fetch: {len(wfm_infos)} waveforms '
+              f'({num_records} records x {self.channel_count} channels), '
+              f'samples={num_pts}')
+        # scaling is fixed per channel, so the first record's infos cover it
+        first = wfm_infos[:self.channel_count]
+        gain = np.array([wfm.gain for wfm in first], dtype=np.float64)
+        offset = np.array([wfm.offset for wfm in first], dtype=np.float64)
+        return data, gain, offset
+
+    # ---------- streaming (fetch while acquiring) ----------
+    def _fetch_chunk(self, data, gain, offset, start, n, timeout):
+        """Fetch samples [start, start+n) of record 0 for every channel directly
+        into the matching slice of data[channel] (each slice is contiguous)."""
+        for ch in range(self.channel_count):
+            wfm = self.scope.channels[ch].fetch_into(
+                data[ch, start:start + n],
+                relative_to=niscope.FetchRelativeTo.PRETRIGGER,
+                offset=start,
+                record_number=0,
+                num_records=1,
+                timeout=timeout,
+            )[0]
+            gain[ch] = wfm.gain
+            offset[ch] = wfm.offset
+
+    def _stream_loop(self, data, gain, offset, num_pts, chunk):
+        """Background thread: pull completed chunks while the shot is running."""
+        try:
+            while self._stream_pos < num_pts and not self._stream_stop.is_set():
+                n = min(chunk, num_pts - self._stream_pos)
+                try:
+                    self._fetch_chunk(data, gain, offset, self._stream_pos, n,
+                                      self.stream_poll_timeout)
+                except (niscope.errors.DriverError, FetchTimeout) as e:
+                    if _fetch_timed_out(e):
+                        # Chunk not acquired yet; try again
+                        continue
+                    # Leave the rest to the fetch in _finish_streaming, which
+                    # raises if the scope really is in trouble
+                    print(f'[NI_SCOPE] Streaming fetch failed: {e}')
+                    break
+                self._stream_pos += n
+        except Exception as e:
+            print(f'[NI_SCOPE] Streaming fetch stopped: {e}')
+
+    def _start_streaming(self, dtype):
+        chunk = int(self.stream_chunk_size)
+        num_pts = self.min_num_pts
+        data = self._get_fetch_buffer(num_pts, dtype, 1)[0]
+        self._stream_gain = np.zeros(self.channel_count)
+        self._stream_voffset = np.zeros(self.channel_count)
+        self._stream_pos = 0
+        self._stream_stop.clear()
+        self._stream_thread = threading.Thread(
+            target=self._stream_loop,
+            args=(data, self._stream_gain, self._stream_voffset, num_pts, chunk),
+            daemon=True,
+        )
+        self._stream_thread.start()
+        print(f'[NI_SCOPE] Streaming fetch started: chunk={chunk}, N={num_pts}')
+
+    def _stop_streaming(self):
+        if self._stream_thread is None:
+            return
+        self._stream_stop.set()
+        self._stream_thread.join()
+        self._stream_thread = None
+
+    def _finish_streaming(self):
+        """Stop the stream thread and fetch whatever tail it had not reached."""
+        self._stop_streaming()
+        data = self._fetch_buffer[0]
+        num_pts = self.min_num_pts
+        start = self._stream_pos
+        if start < num_pts:
+            self._fetch_chunk(data, self._stream_gain, self._stream_voffset,
+                              start, num_pts - start, 5.0)
+        print(f'[NI_SCOPE] Fetch: streamed {start} samples, tail {num_pts - start}')
+        return self._fetch_buffer, self._stream_gain, self._stream_voffset
+
+    def _streaming_enabled(self):
+        chunk = getattr(self, 'stream_chunk_size', None)
+        return bool(chunk) and int(getattr(self, 'num_records', 1)) == 1
+
+    # ---------- manual-mode live preview ----------
+    def _decimate_minmax(self, data, bins):
+        """Reduce [channels, samples] to [channels, 2*bins] interleaved per-bin
+        min/max, so spikes stay visible and the plot size does not depend on
+        the record length. Returns (decimated, samples_per_bin)."""
+        n = data.shape[-1]
+        bins = max(1, min(int(bins), n))
+        width = n // bins
+        blocks = data[:, :bins * width].reshape(data.shape[0], bins, width)
+        out = np.empty((data.shape[0], bins, 2), dtype=data.dtype)
+        np.min(blocks, axis=2, out=out[:, :, 0])
+        np.max(blocks, axis=2, out=out[:, :, 1])
+        return out.reshape(data.shape[0], 2 * bins), width
+
+    def _preview_loop(self, num_pts):
+        """Background thread: immediate-trigger acquisitions, decimated and
+        published for the tab no faster than preview_rate."""
+        period = 1.0 / float(self.preview_rate)
+        data = np.empty((self.channel_count, num_pts))
+        channels = ','.join(str(i) for i in range(self.channel_count))
+        dt = 1.0 / self.scope.horz_sample_rate
+        t_first = -(self.scope.horz_record_ref_position / 100.0) * num_pts * dt
+        fetch_timeout = num_pts * dt + 1.0
+        seq = 0
+        try:
+            while not self._preview_stop.is_set():
+                t_start = time.monotonic()
+                self.scope.initiate()
+                try:
+                    self.scope.channels[channels].fetch_into(
+                        data.ravel(), record_number=0, num_records=1, timeout=fetch_timeout
+                    )
+                except (niscope.errors.DriverError, FetchTimeout) as e:
+                    self.scope.abort()
+                    if _fetch_timed_out(e):
+                        continue
+                    raise
+                self.scope.abort()
+
+                y, width = self._decimate_minmax(data, self.preview_points)
+                centres = t_first + (np.arange(y.shape[1] // 2) * width + width / 2.0) * dt
+                seq += 1
+                with self._preview_lock:
+                    self._preview_frame = {
+                        'seq': seq,
+                        't': np.repeat(centres, 2),
+                        'y': y,
+                        'acquire_time': time.monotonic() - t_start,
+                    }
+                self._preview_stop.wait(max(0.0, period - (time.monotonic() - t_start)))
+        except Exception as e:
+            print(f'[NI_SCOPE] Live preview stopped: {e}')
+
+    def _start_preview(self):
+        """Configure a single immediate-trigger record with the current
+        horizontal/vertical settings and start the preview thread."""
+        if self._preview_thread is not None:
+            return True
+        # The preview replaces the shot trigger/records, force a full setup next shot
+        self._applied_config = None
+        try:
+            self.scope.abort()
+            num_pts = int(self.min_num_pts)
+            self.scope.configure_horizontal_timing(
+                min_sample_rate=self.min_sample_rate,
+                min_num_pts=num_pts,
+                ref_position=1.0,
+                num_records=1,
+                enforce_realtime=True
+            )
+            if self._configure_vertical() is not None:
+                return False
+            self.scope.configure_trigger_immediate()
+        except Exception as e:
+            print(f'[NI_SCOPE] Could not start live preview: {e}')
+            return False
+        self._preview_stop.clear()
+        self._preview_thread = threading.Thread(
+            target=self._preview_loop, args=(num_pts,), daemon=True
+        )
+        self._preview_thread.start()
+        print(f'[NI_SCOPE] Live preview started: <= {self.preview_rate} Hz, '
+              f'{self.preview_points} bins/channel')
+        return True
+
+    def _stop_preview(self):
+        if self._preview_thread is None:
+            return
+        self._preview_stop.set()
+        self._preview_thread.join()
+        self._preview_thread = None
+        try:
+            self.scope.abort()
+        except Exception as e:
+            print(f'[NI_SCOPE] abort() after live preview: {e}')
+        print('[NI_SCOPE] Live preview stopped.')
+
+    def start_preview(self):
+        self._preview_enabled = True
+        return self._start_preview()
+
+    def stop_preview(self):
+        self._preview_enabled = False
+        self._stop_preview()
+        with self._preview_lock:
+            self._preview_frame = None
+        return True
+
+    def get_preview_frame(self, last_seq=0):
+        """Latest decimated frame, or None if nothing newer than last_seq."""
+        with self._preview_lock:
+            frame = self._preview_frame
+        if frame is None or frame['seq'] == last_seq:
+            return None
+        return frame
+
+    # ---------- phase timing ----------
+    @contextlib.contextmanager
+    def _timed(self, phase):
+        """Add the wall time of the with-block to this shot's phase duration."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._shot_timing[phase] = self._shot_timing.get(phase, 0.0) + time.perf_counter() - t0
+
+    def _save_timing(self, hdf_file):
+        """Write this shot's phase durations (seconds) to /data/timing/<device>
+        and add them to the rolling history."""
+        grp = hdf_file.require_group('/data/timing')
+        if self.device_name in grp:
+            del grp[self.device_name]
+        tgrp = grp.create_group(self.device_name)
+        for phase, duration in self._shot_timing.items():
+            tgrp.attrs[phase] = duration
+            self._timing_history[phase].append(duration)
+
+    def get_timing_stats(self):
+        """Rolling per-phase statistics (ms) over the last timing_window shots."""
+        stats = {}
+        for phase, history in self._timing_history.items():
+            a = np.asarray(history) * 1e3
+            stats[phase] = {
+                'n': len(a),
+                'last': float(a[-1]),
+                'mean': float(a.mean()),
+                'median': float(np.median(a)),
+                'p95': float(np.percentile(a, 95)),
+                'max': float(a.max()),
+            }
+        return stats
+
+    def _print_timing(self):
+        stats = self.get_timing_stats()
+        parts = [f"{phase}={self._shot_timing[phase] * 1e3:.1f}"
+                 f"(med {stats[phase]['median']:.1f})"
+                 for phase in self._shot_timing]
+        print('[NI_SCOPE] Timing ms: ' + ', '.join(parts))
+
+    # ---------- analysis windows ----------
+    def _compute_windows(self, data, gain, offset, timebase):
+        """Reduce the compile-time analysis windows to per-record scalars.
+
+        data is [channels, samples] or [records, channels, samples], in volts
+        or int16 codes (scaled here with gain/offset, one slice at a time).
+        Returns {window: {quantity: array over records}}.
+        """
+        windows = getattr(self, 'analysis_windows', None) or []
+        if not windows:
+            return {}
+        if not timebase:
+            print('[NI_SCOPE] Warning: no time base, skipping analysis windows')
+            return {}
+
+        t0, dt = timebase['t0'], timebase['dt']
+        records = data if data.ndim == 3 else data[np.newaxis]
+        n_samples = records.shape[-1]
+        results = {}
+        for w in windows:
+            ch = int(w['channel'])
+            i0 = max(0, int(np.ceil((w['start'] - t0) / dt)))
+            i1 = min(n_samples, int(np.floor((w['stop'] - t0) / dt)) + 1)
+            if i1 <= i0 or ch >= records.shape[1]:
+                print(f"[NI_SCOPE] Warning: analysis window '{w['name']}' outside record, skipped")
+                continue
+            seg = records[:, ch, i0:i1]
+            if seg.dtype != np.float64:
+                seg = seg * gain[ch] + offset[ch]
+            results[w['name']] = {
+                'integral': seg.sum(axis=-1) * dt,
+                'mean': seg.mean(axis=-1),
+                'std': seg.std(axis=-1),
+                'n': np.full(records.shape[0], i1 - i0),
+            }
+
+        for w in windows:
+            bg = w.get('background')
+            if bg and w['name'] in results and bg in results:
+                r = results[w['name']]
+                r['integral_bgsub'] = r['integral'] - results[bg]['mean'] * r['n'] * dt
+        return results
+
+    def _save_window_results(self, hdf_file, results):
+        """Single-record results go to /results/<device> attrs (lyse picks them
+        up as scalars); multi-record results are saved as datasets there."""
+        grp = hdf_file.require_group(f'/results/{self.device_name}')
+        for name, quantities in results.items():
+            for quantity, values in quantities.items():
+                key = f'{name}_{quantity}'
+                if len(values) == 1:
+                    grp.attrs[key] = values[0]
+                else:
+                    if key in grp:
+                        del grp[key]
+                    grp.create_dataset(key, data=values)
+
     def _configure_horizontal(self):
         """Start-trigger style capture with 50% reference position."""
         self.scope.configure_horizontal_timing(
             min_sample_rate=self.min_sample_rate,
             min_num_pts=self.min_num_pts,
             ref_position=1.0,      # percent; 1% = start-trigger style capture
-            num_records=1,
+            num_records=int(getattr(self, 'num_records', 1)),
             enforce_realtime=True
         )
-        print(f'[NI_SCOPE] Horizontal: fs_min={self.min_sample_rate}, N_min={self.min_num_pts}, ref_pos=50%')
+        print(f'[NI_SCOPE] Horizontal: fs_min={self.min_sample_rate}, N_min={self.min_num_pts}, '
+              f'records={getattr(self, "num_records", 1)}, ref_pos=1%')
 
     def _normalize_trigger_source(self, src):
         """Return (src_norm, mode) where mode is 'analog', 'digital', or 'immediate'."""
@@ -422,15 +806,20 @@ class NI_SCOPEWorker(Worker):
 
     # ---------- BLACS transitions ----------
     def transition_to_buffered(self, device_name, h5file, front_panel_values, refresh):
-        try:
-            self.scope.abort()
-        except Exception as e:
-            print(f'[NI_SCOPE] abort() at enter buffered (ignored): {e}')
+        t_enter = time.perf_counter()
+        self._shot_timing = {}
+        with self._timed('stop_background'):
+            self._stop_preview()
+            self._stop_streaming()
+            try:
+                self.scope.abort()
+            except Exception as e:
+                print(f'[NI_SCOPE] abort() at enter buffered (ignored): {e}')
 
         self.h5file = h5file
         self.device_name = device_name
 
-        with h5py.File(h5file, 'r') as hdf5_file:
+        with self._timed('load_properties'), h5py.File(h5file, 'r') as hdf5_file:
             print('\n' + h5file)
             self.scope_params = labscript_utils.properties.get(
                 hdf5_file, device_name, 'device_properties'
@@ -438,6 +827,8 @@ class NI_SCOPEWorker(Worker):
 
         for k, v in self.scope_params.items():
             setattr(self, k, v)
+        # Per-shot property: don't let a previous shot's windows linger
+        self.analysis_windows = self.scope_params.get('analysis_windows', [])
 
         self.trigger_source   = getattr(self, 'trigger_source', 'TRIG')
         self.trigger_level    = float(getattr(self, 'trigger_level', 1.0))
@@ -450,53 +841,116 @@ class NI_SCOPEWorker(Worker):
               f"slope={self.trigger_slope}, coup={self.trigger_coupling}, "
               f"Vcoupling={self.vertical_coupling}, delay={self.trigger_delay}")
 
-        try:
-            self._configure_horizontal()
-            self._configure_trigger()
-            self._configure_vertical()
-        except Exception as e:
-            print(f"[NI_SCOPE] ERROR during configuration: {e}")
+        config = self._config_fingerprint()
+        self.config_reused = (not refresh) and config == self._applied_config
+        if self.config_reused:
+            print('[NI_SCOPE] Configuration unchanged, skipping driver setup.')
+        else:
+            # abort() clears this again if _configure_vertical bails out
+            self._applied_config = config
             try:
-                self.scope.abort()
-            except Exception as e2:
-                print(f"[NI_SCOPE] abort() after config error: {e2}")
-            raise
+                with self._timed('configure_horizontal'):
+                    self._configure_horizontal()
+                with self._timed('configure_trigger'):
+                    self._configure_trigger()
+                with self._timed('configure_vertical'):
+                    self._configure_vertical()
+            except Exception as e:
+                self._applied_config = None
+                print(f"[NI_SCOPE] ERROR during configuration: {e}")
+                try:
+                    self.scope.abort()
+                except Exception as e2:
+                    print(f"[NI_SCOPE] abort() after config error: {e2}")
+                raise
 
         print('[NI_SCOPE] Initiating acquisition…')
-        self.scope.initiate()
+        with self._timed('initiate'):
+            self.scope.initiate()
+        if self._streaming_enabled():
+            storage_format = getattr(self, 'storage_format', 'float64')
+            self._start_streaming(np.int16 if storage_format == 'int16' else np.float64)
+        self._shot_timing['transition_to_buffered'] = time.perf_counter() - t_enter
         return {}
 
     def transition_to_manual(self):
+        t_enter = time.perf_counter()
+        streamed = self._stream_thread is not None
+        if streamed:
+            # Finish streaming before touching any other session attributes
+            with self._timed('fetch'):
+                data, gain, offset = self._finish_streaming()
+
+        timebase = {}
         try:
             self.channel_count = self.scope.channel_count
             self.num_samps_actual = self.scope.horz_record_length
             self.samp_rate_actual = self.scope.horz_sample_rate
+            ref_position = self.scope.horz_record_ref_position   # percent of record
             print(f'[NI_SCOPE] Post-shot: fs={self.samp_rate_actual:.6g} Hz, N={self.num_samps_actual}')
+            dt = 1.0 / self.samp_rate_actual
+            # time of the first sample relative to the trigger event
+            t0 = self.trigger_delay - (ref_position / 100.0) * self.num_samps_actual * dt
+            timebase = {
+                'sample_rate': float(self.samp_rate_actual),
+                'dt': dt,
+                't0': t0,
+                'record_length': int(self.num_samps_actual),
+                'ref_position': float(ref_position),
+                'trigger_delay': float(self.trigger_delay),
+            }
         except Exception as e:
             print(f'[NI_SCOPE] Warning reading actual timing: {e}')
 
-        data = np.zeros([self.channel_count, self.min_num_pts])
-        for i in range(self.channel_count):
-            wfm = self.scope.channels[i].fetch(num_records=1)
-            ns = min(len(wfm[0].samples), self.min_num_pts)
-            print(f'[NI_SCOPE] Fetch: CH{wfm[0].channel}, rec {wfm[0].record}, '
-                  f'samples={len(wfm[0].samples)} (saving {ns})')
-            data[i, :ns] = wfm[0].samples[:ns]
+        storage_format = getattr(self, 'storage_format', 'float64')
+        num_records = int(getattr(self, 'num_records', 1))
+        dtype = np.int16 if storage_format == 'int16' else np.float64
+        if not streamed:
+            with self._timed('fetch'):
+                data, gain, offset = self._fetch_all_channels(self.min_num_pts, dtype, num_records)
+        if num_records == 1:
+            # keep the single-record [channels, samples] layout readers expect
+            data = data[0]
 
+        with self._timed('analysis'):
+            window_results = self._compute_windows(data, gain, offset, timebase)
+
+        t_write = time.perf_counter()
         with h5py.File(self.h5file, 'r+') as hdf_file:
             grp = hdf_file.require_group('/data/traces')
             print('[NI_SCOPE] Saving traces…')
             if self.device_name in grp:
                 del grp[self.device_name]
-            grp.create_dataset(self.device_name, data=data)
+            dset = grp.create_dataset(self.device_name, data=data)
+            dset.attrs['config_reused'] = self.config_reused
+            dset.attrs['storage_format'] = storage_format
+            dset.attrs['num_records'] = num_records
+            dset.attrs['streamed'] = streamed
+            for k, v in timebase.items():
+                dset.attrs[k] = v
+            if storage_format == 'int16':
+                # volts = code * gain + offset, one entry per channel
+                dset.attrs['gain'] = gain
+                dset.attrs['offset'] = offset
+            if window_results:
+                self._save_window_results(hdf_file, window_results)
+            # hdf5_write excludes the file close, which happens after this
+            now = time.perf_counter()
+            self._shot_timing['hdf5_write'] = now - t_write
+            self._shot_timing['transition_to_manual'] = now - t_enter
+            self._save_timing(hdf_file)
         print('[NI_SCOPE] Fetch complete.')
+        self._print_timing()
 
         try:
             self.scope.abort()
         except Exception as e:
             print(f'[NI_SCOPE] abort() before manual idle: {e}')
 
-        print('[NI_SCOPE] Manual mode: leaving scope IDLE (not armed).')
+        if self._preview_enabled:
+            self._start_preview()
+        else:
+            print('[NI_SCOPE] Manual mode: leaving scope IDLE (not armed).')
         return True
 
     def program_manual(self, values):
@@ -504,6 +958,10 @@ class NI_SCOPEWorker(Worker):
 
     def abort(self):
         print('[NI_SCOPE] abort()')
+        self._stop_preview()
+        self._stop_streaming()
+        # Driver state is unknown after an abort, force a full setup next shot
+        self._applied_config = None
         try:
             self.scope.abort()
             return True
@@ -513,9 +971,15 @@ class NI_SCOPEWorker(Worker):
 
     def abort_buffered(self):
         print('[NI_SCOPE] abort_buffered()')
-        return self.abort()
+        ok = self.abort()
+        if self._preview_enabled:
+            self._start_preview()
+        return ok
 
     def abort_transition_to_buffered(self):
         print('[NI_SCOPE] abort_transition_to_buffered()')
-        return self.abort()
+        ok = self.abort()
+        if self._preview_enabled:
+            self._start_preview()
+        return ok
 
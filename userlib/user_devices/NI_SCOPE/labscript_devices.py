@@ -92,6 +92,16 @@ class NI_SCOPE(Device):
          trigger_source
          trigger_level
          trigger_delay
+         num_records      records (triggers) acquired per shot
+         storage_format   'float64' (volts) or 'int16' (raw ADC codes + gain/offset attrs)
+         stream_chunk_size  samples per chunk fetched while the shot is still
+                            running (single-record only); None disables streaming
+         mock             use a simulated session with synthetic traces (no hardware)
+         preview_rate     max frames/s of the manual-mode live preview in the tab
+         preview_points   min/max bins per channel sent to the live preview
+
+       device_properties (set per shot)
+         analysis_windows  see add_analysis_window()
     """
     description = 'NI-SCOPE High-Speed Digitizer'
 
@@ -105,7 +115,13 @@ class NI_SCOPE(Device):
                 'min_num_pts',
                 'trigger_source',
                 'trigger_level',
-                'trigger_delay'
+                'trigger_delay',
+                'num_records',
+                'storage_format',
+                'stream_chunk_size',
+                'mock',
+                'preview_rate',
+                'preview_points'
             ],
             'device_properties': []}
         )
@@ -121,8 +137,25 @@ class NI_SCOPE(Device):
         trigger_source = None,
         trigger_level = 2.5,
         trigger_delay  = 0.0,
+        num_records = 1,
+        storage_format = 'float64',
+        stream_chunk_size = None,
+        mock = False,
+        preview_rate = 10.0,
+        preview_points = 1000,
         **kwargs):
 
+        if int(num_records) < 1:
+            raise LabscriptError(f"{name}: num_records must be >= 1, got {num_records}")
+
+        if storage_format not in ('float64', 'int16'):
+            raise LabscriptError(
+                f"{name}: storage_format must be 'float64' or 'int16', got {storage_format!r}")
+
+        if float(preview_rate) <= 0 or int(preview_points) < 1:
+            raise LabscriptError(
+                f"{name}: preview_rate must be > 0 and preview_points >= 1")
+
         # formally instantiate labscripts.base.device
         # with minimum needed declarations
         Device.__init__(
@@ -142,6 +175,42 @@ class NI_SCOPE(Device):
         self.trigger_source = trigger_source
         self.trigger_delay_time = trigger_delay
         self.trigger_level = trigger_level
+        self.num_records = int(num_records)
+        self.storage_format = storage_format
+        self.stream_chunk_size = stream_chunk_size
+        self.mock = mock
+        self.preview_rate = preview_rate
+        self.preview_points = preview_points
+        self.analysis_windows = []
+
+    def add_analysis_window(self, name, channel, start, stop, background=None):
+        """Have the worker reduce a time window of one channel to scalars.
+
+        After each shot the worker writes <name>_integral (V*s), <name>_mean,
+        <name>_std and <name>_n to /results/<device>, so lyse can use them
+        without loading the trace. start/stop are in seconds relative to the
+        scope trigger. If background names another window, <name>_integral_bgsub
+        is also saved: the integral minus that window's mean over this window.
+        """
+        if stop <= start:
+            raise LabscriptError(f"{self.name}: analysis window '{name}' has stop <= start")
+        if any(w['name'] == name for w in self.analysis_windows):
+            raise LabscriptError(f"{self.name}: duplicate analysis window '{name}'")
+        self.analysis_windows.append({
+            'name': str(name),
+            'channel': int(channel),
+            'start': float(start),
+            'stop': float(stop),
+            'background': background,
+        })
 
     def generate_code(self, hdf5_file):
+        names = {w['name'] for w in self.analysis_windows}
+        for w in self.analysis_windows:
+            if w['background'] is not None and w['background'] not in names:
+                raise LabscriptError(
+                    f"{self.name}: analysis window '{w['name']}' uses unknown "
+                    f"background window '{w['background']}'")
+        self.set_property('analysis_windows', self.analysis_windows,
+                          location='device_properties')
         Device.generate_code(self, hdf5_file)
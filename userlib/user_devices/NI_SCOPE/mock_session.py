@@ -0,0 +1,221 @@
+#####################################################################
+#                                                                   #
+# /NI_SCOPE/mock_session.py                                         #
+#                                                                   #
+# A simulated niscope.Session for running NI_SCOPEWorker without    #
+# a PXI chassis (connection table: mock=True)                       #
+#                                                                   #
+#####################################################################
+
+import time
+import numpy as np
+
+
+class FetchTimeout(Exception):
+    """Raised by a fetch whose samples have not been 'acquired' yet, the
+    equivalent of NI-SCOPE's max-time-exceeded DriverError."""
+    pass
+
+
+class MockWaveformInfo(object):
+    """The parts of niscope.WaveformInfo the worker and readers use."""
+    def __init__(self, channel, record, samples, gain, offset, x_increment, relative_initial_x):
+        self.channel = channel
+        self.record = record
+        self.samples = samples
+        self.gain = gain
+        self.offset = offset
+        self.x_increment = x_increment
+        self.relative_initial_x = relative_initial_x
+        self.absolute_initial_x = relative_initial_x
+
+
+class _MockChannels(object):
+    """session.channels[...] accepting an int, '0,1', '0:1' or a list."""
+    def __init__(self, session, channels):
+        self._session = session
+        self._channels = channels
+
+    def configure_vertical(self, range, coupling, offset=0.0, probe_attenuation=1.0, enabled=True):
+        for ch in self._channels:
+            self._session._vertical_range[ch] = float(range)
+            self._session._vertical_coupling[ch] = coupling
+
+    def fetch(self, num_samples=None, relative_to=None, offset=0, record_number=0,
+              num_records=None, timeout=5.0):
+        s = self._session
+        if num_records is None:
+            num_records = s._num_records - record_number
+        if num_samples is None:
+            num_samples = s.horz_record_length - offset
+        out = np.empty(len(self._channels) * num_records * num_samples)
+        infos = self.fetch_into(out, relative_to, offset, record_number, num_records, timeout)
+        return infos
+
+    def fetch_into(self, waveform, relative_to=None, offset=0, record_number=0,
+                   num_records=None, timeout=5.0):
+        """Fill a flat array record by record, channels within each record,
+        like the driver does. Integer arrays get scaled binary codes."""
+        s = self._session
+        if num_records is None:
+            num_records = s._num_records - record_number
+        n_wfms = len(self._channels) * num_records
+        num_samples = len(waveform) // n_wfms
+        s._wait_for(record_number + num_records, offset + num_samples, timeout)
+
+        dt = 1.0 / s.horz_sample_rate
+        t_first = -(s.horz_record_ref_position / 100.0) * s.horz_record_length * dt
+        infos = []
+        i = 0
+        for rec in range(record_number, record_number + num_records):
+            for ch in self._channels:
+                volts = s._records[rec, ch, offset:offset + num_samples]
+                dest = waveform[i * num_samples:(i + 1) * num_samples]
+                gain, v_offset = s._binary_scaling(ch)
+                if np.issubdtype(waveform.dtype, np.integer):
+                    info = np.iinfo(waveform.dtype)
+                    codes = np.rint((volts - v_offset) / gain)
+                    dest[:] = np.clip(codes, info.min, info.max)
+                else:
+                    dest[:] = volts
+                    gain, v_offset = 1.0, 0.0
+                infos.append(MockWaveformInfo(
+                    str(ch), rec, dest, gain, v_offset, dt, t_first + offset * dt
+                ))
+                i += 1
+        return infos
+
+
+class MockSession(object):
+    """Local stand-in for niscope.Session producing synthetic PMT-like traces.
+
+    Channel 0 is a fluorescence burst (fast rise, exponential decay, shot
+    noise), channel 1 an absorption dip, both on a noisy baseline. With
+    realtime=True samples only become available at the configured sample
+    rate after initiate(), so streaming fetches behave like the hardware;
+    otherwise the whole record is available immediately.
+
+    Synthesis is not part of what we want to measure, so a small bank of
+    records is generated once per configuration and initiate() cycles
+    through it.
+    """
+    instrument_manufacturer = 'Simulated'
+    instrument_model = 'NI PXIe-5922 (mock)'
+    instrument_firmware_revision = 'mock'
+    bank_size = 4
+
+    def __init__(self, resource_name, channel_count=2, realtime=False, seed=None):
+        self.resource_name = resource_name
+        self.channel_count = channel_count
+        self.realtime = realtime
+        self._rng = np.random.default_rng(seed)
+        self._vertical_range = [1.0] * channel_count
+        self._vertical_coupling = [None] * channel_count
+        self.horz_sample_rate = 1e6
+        self.horz_record_length = 1000
+        self.horz_record_ref_position = 50.0
+        self._num_records = 1
+        self._trigger = ('immediate', None, 0.0)
+        self._records = None
+        self._bank = []
+        self._bank_key = None
+        self._bank_index = 0
+        self._t_initiate = None
+        self.channels = _MockChannelsFactory(self)
+
+    # ---------- configuration ----------
+    def configure_horizontal_timing(self, min_sample_rate, min_num_pts, ref_position,
+                                    num_records, enforce_realtime):
+        self.horz_sample_rate = float(min_sample_rate)
+        self.horz_record_length = int(min_num_pts)
+        self.horz_record_ref_position = float(ref_position)
+        self._num_records = int(num_records)
+
+    def configure_trigger_edge(self, trigger_source, level, slope, trigger_coupling,
+                               holdoff=0.0, delay=0.0):
+        self._trigger = ('edge', trigger_source, float(delay))
+
+    def configure_trigger_digital(self, trigger_source, slope=None, holdoff=0.0, delay=0.0):
+        self._trigger = ('digital', trigger_source, float(delay))
+
+    def configure_trigger_immediate(self):
+        self._trigger = ('immediate', None, 0.0)
+
+    # ---------- acquisition ----------
+    def initiate(self):
+        key = (self.horz_record_length, self.horz_sample_rate, self.horz_record_ref_position,
+               self._num_records, tuple(self._vertical_range))
+        if key != self._bank_key:
+            self._bank = [self._synthesize() for _ in range(self.bank_size)]
+            self._bank_key = key
+        self._records = self._bank[self._bank_index % len(self._bank)]
+        self._bank_index += 1
+        self._t_initiate = time.perf_counter()
+
+    def abort(self):
+        self._t_initiate = None
+
+    def close(self):
+        self.abort()
+
+    def _binary_scaling(self, ch):
+        """(gain, offset) so that volts = code * gain + offset for int16."""
+        return self._vertical_range[ch] / 65535.0, 0.0
+
+    def _wait_for(self, n_records, n_samples, timeout):
+        """Block until the requested samples exist, like a driver fetch."""
+        if self._records is None:
+            raise RuntimeError('MockSession: fetch before initiate()')
+        if not self.realtime:
+            return
+        record_time = self.horz_record_length / self.horz_sample_rate
+        needed = (n_records - 1) * record_time + n_samples / self.horz_sample_rate
+        remaining = self._t_initiate + needed - time.perf_counter()
+        if remaining > float(timeout):
+            time.sleep(float(timeout))
+            raise FetchTimeout('MockSession: maximum time exceeded')
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _synthesize(self):
+        n = self.horz_record_length
+        dt = 1.0 / self.horz_sample_rate
+        t = np.arange(n) * dt - (self.horz_record_ref_position / 100.0) * n * dt
+        shape = (self._num_records, self.channel_count, n)
+        data = np.empty(shape)
+        for rec in range(self._num_records):
+            arrival = 2e-3 + self._rng.normal(0, 1e-4)
+            after = np.clip(t - arrival, 0, None)
+            envelope = np.where(t >= arrival, 1 - np.exp(-after / 5e-5), 0.0) * np.exp(-after / 2e-3)
+            for ch in range(self.channel_count):
+                rng_v = self._vertical_range[ch]
+                noise = self._rng.normal(0, 0.01 * rng_v, n)
+                if ch == 0:
+                    amplitude = 0.2 * rng_v * self._rng.uniform(0.5, 1.5)
+                    signal = -amplitude * self._rng.poisson(50 * envelope) / 50.0
+                else:
+                    signal = -0.05 * rng_v * envelope
+                data[rec, ch] = signal + noise
+        return data
+
+
+class _MockChannelsFactory(object):
+    def __init__(self, session):
+        self._session = session
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            channels = [int(key)]
+        elif isinstance(key, str):
+            channels = []
+            for part in key.split(','):
+                if ':' in part:
+                    lo, hi = part.split(':')
+                    channels.extend(range(int(lo), int(hi) + 1))
+                else:
+                    channels.append(int(part))
+        elif isinstance(key, slice):
+            channels = list(range(self._session.channel_count))[key]
+        else:
+            channels = [int(k) for k in key]
+        return _MockChannels(self._session, channels)
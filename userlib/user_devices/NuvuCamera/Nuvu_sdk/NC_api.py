@@ -1,11 +1,14 @@
 from ctypes import *
 from .structures import *
 from .defines import *
+from . import simulated_sdk
 import platform as p
 
 (bit, os) = p.architecture()
 
-if os == "ELF": # Ubuntu
+if simulated_sdk.enabled(): # no camera, see simulated_sdk.py
+    nuvuLib = simulated_sdk.library()
+elif os == "ELF": # Ubuntu
     nuvuLib = CDLL("libnuvu.so", mode=RTLD_GLOBAL)
 elif os == "WindowsPE":
     if bit == "64bit":
@@ -131,6 +134,41 @@ ncCamGetSize = nuvuLib.ncCamGetSize
 ncCamGetSize.restype = c_int
 ncCamGetSize.argtypes= [NCCAM, POINTER(c_int), POINTER(c_int)]
 
+#get max size (full sensor, unbinned)
+ncCamGetMaxSize = nuvuLib.ncCamGetMaxSize
+ncCamGetMaxSize.restype = c_int
+ncCamGetMaxSize.argtypes = [NCCAM, POINTER(c_int), POINTER(c_int)]
+
+#set ROI size
+ncCamSetMRoiSize = nuvuLib.ncCamSetMRoiSize
+ncCamSetMRoiSize.restype = c_int
+ncCamSetMRoiSize.argtypes = [NCCAM, c_int, c_int, c_int]
+
+#get ROI size
+ncCamGetMRoiSize = nuvuLib.ncCamGetMRoiSize
+ncCamGetMRoiSize.restype = c_int
+ncCamGetMRoiSize.argtypes = [NCCAM, c_int, POINTER(c_int), POINTER(c_int)]
+
+#set ROI position
+ncCamSetMRoiPosition = nuvuLib.ncCamSetMRoiPosition
+ncCamSetMRoiPosition.restype = c_int
+ncCamSetMRoiPosition.argtypes = [NCCAM, c_int, c_int, c_int]
+
+#get ROI position
+ncCamGetMRoiPosition = nuvuLib.ncCamGetMRoiPosition
+ncCamGetMRoiPosition.restype = c_int
+ncCamGetMRoiPosition.argtypes = [NCCAM, c_int, POINTER(c_int), POINTER(c_int)]
+
+#apply ROI changes
+ncCamMRoiApply = nuvuLib.ncCamMRoiApply
+ncCamMRoiApply.restype = c_int
+ncCamMRoiApply.argtypes = [NCCAM]
+
+#discard ROI changes not yet applied
+ncCamMRoiRollback = nuvuLib.ncCamMRoiRollback
+ncCamMRoiRollback.restype = c_int
+ncCamMRoiRollback.argtypes = [NCCAM]
+
 #save Uint32  Inutilisée
 ncCamSaveUInt32Image = nuvuLib.ncCamSaveUInt32Image
 ncCamSaveUInt32Image.restype =  c_int
@@ -154,8 +192,8 @@ ncCamGetControllerTemp.argtypes = [NCCAM, POINTER(c_double)]
 
 #get température component
 ncCamGetComponentTemp = nuvuLib.ncCamGetComponentTemp
-ncCamGetControllerTemp.restype = c_int
-ncCamGetControllerTemp.argtypes = [NCCAM, c_int, POINTER(c_double)]
+ncCamGetComponentTemp.restype = c_int
+ncCamGetComponentTemp.argtypes = [NCCAM, c_int, POINTER(c_double)]
 
 #get Detector temp
 ncCamGetDetectorTemp = nuvuLib.ncCamGetDetectorTemp
@@ -222,6 +260,11 @@ ncCamReadChronological = nuvuLib.ncCamReadChronological
 ncCamReadChronological.restype = c_int
 ncCamReadChronological.argtypes = [NCCAM, POINTER(NCIMAGE) ,POINTER(c_int)]
 
+#host timestamp of an image read from the buffers
+ncCamGetHostSystemTimestamp = nuvuLib.ncCamGetHostSystemTimestamp
+ncCamGetHostSystemTimestamp.restype = c_int
+ncCamGetHostSystemTimestamp.argtypes = [NCCAM, NCIMAGE, POINTER(c_double)]
+
 #set binning mode
 ncCamSetBinningMode = nuvuLib.ncCamSetBinningMode
 ncCamSetBinningMode.restype = c_int
@@ -234,5 +277,5 @@ ncCamGetBinningMode.argtypes = [NCCAM, POINTER(c_int), POINTER(c_int)]
 
 # flush read queue
 ncCamFlushReadQueue = nuvuLib.ncCamFlushReadQueues
-ncCamGetBinningMode.restype = c_int
-ncCamGetBinningMode.argtypes = [NCCAM]
+ncCamFlushReadQueue.restype = c_int
+ncCamFlushReadQueue.argtypes = [NCCAM]
@@ -27,13 +27,37 @@ class NuvuCamUtils(nc_camera):
         "exposure_time":20,
         "timeout": 2000,
         "square_bin": 1,
+        # readout region [offset_x, offset_y, width, height] in unbinned sensor
+        # pixels, None reads out the full sensor
+        "roi": None,
         'target_detector_temp':-60,
         "emccd_gain": 2,
         "trigger_mode":0,
         "shutter_mode":1, # 0= undefined 1 = on, 2= off, 3=auto
     }
+    # Attributes are always programmed in this order: the readout mode sets the
+    # readout time and gain ranges, binning and the ROI change the readout time,
+    # and set_exposure_time derives the waiting time from all three
+    attribute_order = [
+        "readoutMode",
+        "square_bin",
+        "roi",
+        "exposure_time",
+        "timeout",
+        "trigger_mode",
+        "emccd_gain",
+        "target_detector_temp",
+        "shutter_mode",
+    ]
+    # Attributes the camera may reset when the key attribute changes, so they
+    # have to be programmed again even if their own value did not change
+    attribute_dependents = {
+        "readoutMode": ("exposure_time", "emccd_gain"),
+        "square_bin": ("roi", "exposure_time"),
+        "roi": ("exposure_time",),
+    }
 
-    def __init__(self, logger):
+    def __init__(self, logger, nb_buffers=4):
         super().__init__(logger)
 
         self.logger = logger 
@@ -43,23 +67,47 @@ class NuvuCamUtils(nc_camera):
             "exposure_time": self.set_exposure_time,
             "timeout": self.set_timeout,
             "square_bin": self.set_square_bin,
+            "roi": self.set_roi,
             "target_detector_temp": self.set_target_detector_temp,
             "emccd_gain": self.set_calibrated_em_gain,
             "trigger_mode": self.set_trigger_mode,
             "shutter_mode": self.set_shutter_mode
         }
 
-        self.openCam(nbBuff=4)
+        # frames the driver can hold before unread ones get overwritten
+        self.openCam(nbBuff=nb_buffers)
         self.isrunning = False
+
+        # Read everything once (readout modes, ranges, size are static). After
+        # this the setters re-read what they change and temperatures are
+        # refreshed by poll_temperatures(), so cam_info needs no SDK calls.
+        self.getAllCamInfo()
+        self.temperatures_updated = time.monotonic()
     
     def set_attributes(self, attributes):
-        for attr, value in attributes.items():
+        order = {attr: i for i, attr in enumerate(self.attribute_order)}
+        for attr, value in sorted(attributes.items(), key=lambda kv: order.get(kv[0], len(order))):
             if attr in self.attribute_setters:
                 self.logger.debug(f"setting attribute: {attr}")
                 self.attribute_setters[attr](value)
             else:
                 raise ValueError(f"Unknown attribute: {attr}")
-        self.logger.debug(self.getAllCamInfo())
+        self.logger.debug("camera state: %s", self.cam_info)
+
+    @property
+    def cam_info(self):
+        """Last known camera state (same keys as getAllCamInfo), no SDK calls."""
+        return self.cachedCamInfo()
+
+    def poll_temperatures(self):
+        """Refresh the component temperatures in the cached camera state."""
+        for component in range(4):
+            self.getComponentTemp(component)
+        self.temperatures_updated = time.monotonic()
+
+    def temperature_age(self):
+        """Seconds since the cached temperatures were read."""
+        return time.monotonic() - self.temperatures_updated
 
     # disconnect_if_error
     def disconnect_if_error(f):
@@ -151,22 +199,26 @@ class NuvuCamUtils(nc_camera):
     def set_readout_mode(self, readoutMode):
         self.setReadoutMode(readoutMode)
         self.getCurrentReadoutMode()
-        # We can retrieve the initial latched values on the camera after setting ReadoutMode
-        self.logger.debug(f"after setting readout mode:\n{self.getAllCamInfo()}")
+        # readout time and the EM gain ranges/values depend on the readout mode
+        self.getReadoutTime()
+        self.getRawEmGainRange()
+        self.getCalibratedEmGainRange()
+        self.getRawEmGain()
+        self.getCalibratedEmGain()
+        self.logger.debug("after setting readout mode: %s", self.cam_info)
 
     @disconnect_if_error
     def set_trigger_mode(self, triggerMode):
         self.setTriggerMode(triggerMode)
         self.getTriggerMode()
-        self.logger.debug(f"after setting trigger mode:\n{self.getAllCamInfo()}")
+        self.logger.debug("after setting trigger mode: %s", self.cam_info)
         
     @disconnect_if_error
     def set_exposure_time(self, new_exposure_time):
-        self.setExposureTime(new_exposure_time)
+        self.setExposureTime(new_exposure_time) # also latches exposureTime
         self.setWaitingTime(0) # sets the exposure time to the readout time. in buffered acquisition we shouldnt have excess waiting time
-        self.getExposureTime()
         self.getReadoutTime()
-        self.logger.debug(f"after setting exposure time:\n{self.getAllCamInfo()}")
+        self.logger.debug("after setting exposure time: %s", self.cam_info)
     
     @disconnect_if_error
     def set_timeout(self, timeout):
@@ -176,6 +228,35 @@ class NuvuCamUtils(nc_camera):
     def set_square_bin(self, bin_size):
         self.setSquareBinning(bin_size)
 
+    @disconnect_if_error
+    def set_roi(self, roi):
+        """Read out only roi = [offset_x, offset_y, width, height] (unbinned
+        sensor pixels), or the full sensor if roi is None. Frame buffers and
+        saved images follow the resulting image size."""
+        max_width, max_height = self.maxWidth.value, self.maxHeight.value
+        if roi is None:
+            roi = [0, 0, max_width, max_height]
+        if len(roi) != 4:
+            raise Nuvu_wrapper_error(f"roi must be [offset_x, offset_y, width, height], got {roi!r}")
+        offset_x, offset_y, width, height = (int(v) for v in roi)
+        if (offset_x < 0 or offset_y < 0 or width <= 0 or height <= 0
+                or offset_x + width > max_width or offset_y + height > max_height):
+            raise Nuvu_wrapper_error(
+                f"roi {roi!r} does not fit in the {max_width}x{max_height} sensor"
+            )
+        self.setRoi(offset_x, offset_y, width, height)
+        applied = [self.roiOffsetX.value, self.roiOffsetY.value,
+                   self.roiWidth.value, self.roiHeight.value]
+        if applied != [offset_x, offset_y, width, height]:
+            self.logger.warning("camera adjusted roi %s to %s", roi, applied)
+        self.getReadoutTime()
+        self.logger.debug("after setting roi: %s", self.cam_info)
+
+    @property
+    def image_shape(self):
+        """(rows, columns) of the images the camera currently reads out."""
+        return self.imageShape
+
     @disconnect_if_error
     def set_target_detector_temp(self,target):
         self.setTargetDetectorTemp(target)
@@ -185,12 +266,13 @@ class NuvuCamUtils(nc_camera):
     def set_calibrated_em_gain(self, new_em_gain):
         self.setCalibratedEmGain(new_em_gain)
         self.getCalibratedEmGain()
+        self.getRawEmGain()
 
     @disconnect_if_error
     def set_shutter_mode(self, new_shutter_mode):
         self.setShutterMode(new_shutter_mode)
         self.getShutterMode()
-        self.logger.debug(f"after setting shutter mode:\n{self.getAllCamInfo()}")
+        self.logger.debug("after setting shutter mode: %s", self.cam_info)
     
     # Image collection Methods
     @disconnect_if_error
@@ -206,10 +288,37 @@ class NuvuCamUtils(nc_camera):
     
     @disconnect_if_error
     def get_queued_image(self):
-        """get a uint16 image"""
-        print("get_queued_image in user_devices/Nuvu_sdk/Nuvu_cam_utils.py")
+        """get the next queued uint16 image"""
         return self.getImg()
 
+    @disconnect_if_error_real
+    def get_image_view(self):
+        """get the most recent uint16 image as a frame ring view, see release_image"""
+        self.flushReadQueue()
+        return self.getImgView()
+
+    @disconnect_if_error
+    def get_queued_image_view(self):
+        """get the next queued uint16 image as a frame ring view, see release_image"""
+        return self.getImgView()
+
+    def last_frame_info(self):
+        """(images skipped before it, host timestamp) of the last image read."""
+        return self.imagesSkipped.value, self.imageTimestamp.value
+
+    def last_frame_times(self):
+        """time.perf_counter() when the last image was read and when it was copied."""
+        return self.readTime, self.copyTime
+
+    def reserve_frames(self, n_frames):
+        """Make sure the frame ring holds n_frames frames and mark them all free.
+        Only call this when no views from a previous acquisition are in use."""
+        self.allocFrameRing(max(int(n_frames), self.nbBuff))
+        self.frameRing.release_all()
+
+    def release_image(self, image):
+        self.releaseImg(image)
+
     @disconnect_if_error
     def get_bias(self):
         exposure_old = self.exposureTime.value
@@ -224,11 +333,10 @@ class NuvuCamUtils(nc_camera):
     def get_bias64(self):
         return self.get_bias().astype(np.float64)
 
-import matplotlib.pyplot as plt
-
 if __name__ == '__main__':
     import sys
     import logging
+    import matplotlib.pyplot as plt
 
     # Setup logging:
     logger = logging.getLogger('test_BLACS_tab')
@@ -0,0 +1,60 @@
+# file: frame_ring.py
+# desc: Fixed pool of preallocated uint16 frames for nc_camera reads. A read
+#       takes a free slot, copies the SDK image buffer into it and hands out
+#       a numpy view; the consumer gives the slot back with release().
+
+import collections
+import threading
+import numpy as np
+
+
+class FrameRing(object):
+    """
+    Preallocated [n_frames, *shape] uint16 block handed out one frame at a time.
+
+    acquire() returns a view of a free slot. When every slot is in use a
+    standalone array is allocated instead (counted in `misses`), so a slow
+    consumer costs an allocation rather than an overwritten frame.
+    release() accepts any frame acquire() returned; standalone frames and
+    frames of an older ring are ignored.
+    """
+    def __init__(self, n_frames, shape, dtype=np.uint16):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.frames = np.empty((int(n_frames),) + self.shape, dtype=self.dtype)
+        self.frame_nbytes = self.frames[0].nbytes
+        self._free = collections.deque(range(len(self.frames)))
+        self._lock = threading.Lock()
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def n_free(self):
+        with self._lock:
+            return len(self._free)
+
+    def acquire(self):
+        with self._lock:
+            if self._free:
+                return self.frames[self._free.popleft()]
+            self.misses += 1
+        return np.empty(self.shape, dtype=self.dtype)
+
+    def _slot(self, frame):
+        if not isinstance(frame, np.ndarray) or frame.base is not self.frames:
+            return None
+        return (frame.ctypes.data - self.frames.ctypes.data) // self.frame_nbytes
+
+    def release(self, frame):
+        slot = self._slot(frame)
+        if slot is None:
+            return
+        with self._lock:
+            if slot not in self._free:
+                self._free.append(slot)
+
+    def release_all(self):
+        with self._lock:
+            self._free = collections.deque(range(len(self.frames)))
@@ -5,8 +5,10 @@
 # desc: Only for camlink interface
 
 from .NC_api import *
+from .frame_ring import FrameRing
 import numpy as np
 import sys
+import time
 
 class NuvuException(Exception):
     """
@@ -41,8 +43,10 @@ class nc_camera:
     shutterMode (int): Camera shutter state (0=NOT SET, 1=open, 2=closed, 3=auto).
     name (str): Name for saving images to disk using SDK functions.
     comment (str): Comment in the metadata of saved images.
-    width (int): Image width in pixels.
-    height (int): Image height in pixels.
+    width (int): Image width in pixels (after ROI and binning).
+    height (int): Image height in pixels (after ROI and binning).
+    maxWidth, maxHeight (int): Full sensor size in unbinned pixels.
+    roiOffsetX, roiOffsetY, roiWidth, roiHeight (int): Readout region in unbinned pixels.
     inMemoryAccess (bool): Determines if a pointer to an array is allocated for the image.
     saveFormat: Format of images saved by the SDK.
     targetdetectorTempMin (float): Minimum target temperature of the detector.
@@ -68,6 +72,12 @@ class nc_camera:
         self.comment = ""
         self.width = c_int(-1)
         self.height = c_int(-1)
+        self.maxWidth = c_int(-1)
+        self.maxHeight = c_int(-1)
+        self.roiOffsetX = c_int(0)
+        self.roiOffsetY = c_int(0)
+        self.roiWidth = c_int(-1)
+        self.roiHeight = c_int(-1)
         self.saveFormat = 1
         self.detectorTemp = c_double(100.0)
         self.controllerTemp = c_double(100.0)
@@ -88,8 +98,17 @@ class nc_camera:
         self.binx = c_int(0)
         self.biny = c_int(0)
         self.triggerMode = c_int(-4)
+        # set by read(): images the driver overwrote before the last one was read,
+        # and the host timestamp of the last image read
+        self.imagesSkipped = c_int(0)
+        self.imageTimestamp = c_double(0.0)
+        # time.perf_counter() when read() returned the last image and when
+        # getImg() or getImgView() finished copying it, for latency measurements
+        self.readTime = 0.0
+        self.copyTime = 0.0
 
         self.cachedTriggerMode = False
+        self.frameRing = None
 
 
     def errorHandling(self, error):
@@ -332,6 +351,68 @@ class nc_camera:
         except NuvuException as nuvuException:
             self.errorHandling(nuvuException.value())
 
+    def getMaxSize(self):
+        """
+        Get the full sensor size in unbinned pixels.
+
+        Updates the maxWidth and maxHeight attributes of the camera class.
+        """
+        try:
+            error = ncCamGetMaxSize(self.ncCam, byref(self.maxWidth), byref(self.maxHeight))
+            if (error):
+                raise NuvuException(error)
+        except NuvuException as nuvuException:
+            self.errorHandling(nuvuException.value())
+
+    def setRoi(self, offsetX, offsetY, width, height):
+        """
+        Set the readout region (ROI 0) and update data in the camera class.
+        Coordinates are in unbinned pixels; the image size follows from the ROI and binning.
+        :param offsetX: First column read out.
+        :param offsetY: First row read out.
+        :param width: Number of columns read out.
+        :param height: Number of rows read out.
+        :type offsetX, offsetY, width, height: int
+        """
+        try:
+            error = ncCamSetMRoiSize(self.ncCam, 0, width, height)
+            if (error):
+                raise NuvuException(error)
+            error = ncCamSetMRoiPosition(self.ncCam, 0, offsetX, offsetY)
+            if (error):
+                ncCamMRoiRollback(self.ncCam)
+                raise NuvuException(error)
+            error = ncCamMRoiApply(self.ncCam)
+            if (error):
+                raise NuvuException(error)
+        except NuvuException as nuvuException:
+            self.errorHandling(nuvuException.value())
+        self.getRoi()
+        self.getSize()
+
+    def getRoi(self):
+        """
+        Get the readout region (ROI 0) in unbinned pixels.
+
+        Updates the roiOffsetX, roiOffsetY, roiWidth and roiHeight attributes of the camera class.
+        """
+        try:
+            error = ncCamGetMRoiSize(self.ncCam, 0, byref(self.roiWidth), byref(self.roiHeight))
+            if (error):
+                raise NuvuException(error)
+            error = ncCamGetMRoiPosition(self.ncCam, 0, byref(self.roiOffsetX), byref(self.roiOffsetY))
+            if (error):
+                raise NuvuException(error)
+        except NuvuException as nuvuException:
+            self.errorHandling(nuvuException.value())
+
+    @property
+    def imageShape(self):
+        """
+        Numpy shape of a read out image, (rows, columns) = (height, width).
+        """
+        return (self.height.value, self.width.value)
+
     def camIsAcquring(self):
         """
         Start image acquisition and send images to the buffer.
@@ -380,13 +461,19 @@ class nc_camera:
 
     def read(self):
         """
-        Read the next image from the buffer and send it to memory.
+        Read the oldest unread image from the buffers and send it to memory.
+        Updates imagesSkipped (images overwritten in the buffers before this one
+        could be read) and imageTimestamp.
         """
         try:
-            error = ncCamReadChronological(self.ncCam, self.ncImage, byref(c_int()))
+            error = ncCamReadChronological(self.ncCam, self.ncImage, byref(self.imagesSkipped))
             if (error):
                 print('error coming from ncCamReadChronological')
                 raise NuvuException(error)
+            error = ncCamGetHostSystemTimestamp(self.ncCam, self.ncImage, byref(self.imageTimestamp))
+            if (error):
+                raise NuvuException(error)
+            self.readTime = time.perf_counter()
         except NuvuException as nuvuException:
             self.errorHandling(nuvuException.value())
 
@@ -396,8 +483,47 @@ class nc_camera:
         Call read() then cast the image pointer to a 16-bit array and copy it to another part of memory.
         """
         self.read()
-        self.logger.info('getIMG in user_devices/Nuvu_sdk/nc_camera.py')
-        return np.copy(np.ctypeslib.as_array(cast(self.ncImage, POINTER(c_uint16)),(self.width.value,self.height.value)))
+        image = np.copy(np.ctypeslib.as_array(cast(self.ncImage, POINTER(c_uint16)),self.imageShape))
+        self.copyTime = time.perf_counter()
+        return image
+
+
+    def allocFrameRing(self, nbFrames):
+        """
+        Preallocate nbFrames image buffers of the current image size for getImgView().
+        The existing ring is kept if it has the right shape and enough frames.
+        :param nbFrames: Minimum number of frames in the ring.
+        :type nbFrames: int
+        """
+        self.getSize()
+        shape = self.imageShape
+        ring = self.frameRing
+        if ring is None or ring.shape != shape or len(ring) < nbFrames:
+            self.frameRing = FrameRing(nbFrames, shape)
+        return self.frameRing
+
+
+    def getImgView(self):
+        """
+        Call read() then copy the image buffer into a free frame of the ring (no allocation).
+        Returns a view of that frame, valid until it is handed back with releaseImg().
+        """
+        shape = self.imageShape
+        if self.frameRing is None or self.frameRing.shape != shape:
+            self.allocFrameRing(max(self.nbBuff, 1))
+        self.read()
+        frame = self.frameRing.acquire()
+        memmove(frame.ctypes.data, self.ncImage, self.frameRing.frame_nbytes)
+        self.copyTime = time.perf_counter()
+        return frame
+
+
+    def releaseImg(self, frame):
+        """
+        Return a frame obtained from getImgView() to the ring.
+        """
+        if self.frameRing is not None:
+            self.frameRing.release(frame)
 
 
     def saveImage(self, encode = 0):
@@ -614,6 +740,9 @@ class nc_camera:
         self.getCurrentReadoutMode()
         self.getReadoutTime()
         self.getSize()
+        self.getMaxSize()
+        self.getRoi()
+        self.getBinning()
         self.getWaitingTime()
         self.getExposureTime()
         self.getComponentTemp(0)
@@ -630,6 +759,13 @@ class nc_camera:
         self.getTargetDetectorTempRange()
         self.getTriggerMode()
 
+        return self.cachedCamInfo()
+
+    def cachedCamInfo(self):
+        """
+        Build the getAllCamInfo() dictionary from the last values read from the camera,
+        without calling the SDK.
+        """
         cam_info = {
             "nbrReadoutModes": self.nbrReadoutMode.value,
             "currentReadoutMode": self.readoutMode.value,
@@ -637,6 +773,11 @@ class nc_camera:
             "readoutTime": self.readoutTime.value,
             "width": self.width.value,
             "height": self.height.value,
+            "maxWidth": self.maxWidth.value,
+            "maxHeight": self.maxHeight.value,
+            "roi": [self.roiOffsetX.value, self.roiOffsetY.value,
+                    self.roiWidth.value, self.roiHeight.value],
+            "binning": [self.binx.value, self.biny.value],
             "waitingTime": self.waitingTime.value,
             "exposureTime": self.exposureTime.value,
             "componentTemp": {
@@ -682,11 +823,21 @@ class nc_camera:
             error = ncCamSetBinningMode(self.ncCam, bin, bin)
             if(error):
                 raise NuvuException(error)
+        except NuvuException as nuvuException:
+            self.errorHandling(nuvuException.value())
+        self.getBinning()
+        self.getSize()
+
+    def getBinning(self):
+        """
+        Get the binning mode.
+
+        Updates the binx and biny attributes of the camera class.
+        """
+        try:
             error = ncCamGetBinningMode(self.ncCam, byref(self.binx), byref(self.biny))
             if (error):
                 raise NuvuException(error)
-            self.getSize()
-
         except NuvuException as nuvuException:
             self.errorHandling(nuvuException.value())
 
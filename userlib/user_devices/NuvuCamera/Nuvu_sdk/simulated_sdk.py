@@ -0,0 +1,447 @@
+# file: simulated_sdk.py
+# desc: Stand-in for the Nuvu driver library that NC_api.py wraps. Provides
+#       the ncCam* functions as Python callables producing synthetic EMCCD
+#       frames on a timer, so nc_camera, NuvuCamUtils and NuvuCameraWorker
+#       run unchanged without the camera or the driver (connection table:
+#       mock=True). Call enable() before NC_api is first imported.
+
+import ctypes
+import collections
+import sys
+import threading
+import time
+import numpy as np
+
+_options = None
+
+# returned by ncCamReadChronological when no frame arrives within the timeout
+ERROR_TIMEOUT = 1001
+# returned by functions the simulation does not implement
+ERROR_NOT_SIMULATED = 1002
+
+
+def enable(**options):
+    """Make NC_api load SimulatedLibrary(**options) instead of the driver.
+    Must be called before NC_api is imported in this process."""
+    global _options
+    nc_api = __name__.rsplit('.', 1)[0] + '.NC_api'
+    if nc_api in sys.modules and _options is None:
+        raise RuntimeError("NC_api has already loaded the Nuvu driver in this process")
+    _options = dict(options)
+
+
+def enabled():
+    return _options is not None
+
+
+def library():
+    return SimulatedLibrary(**_options)
+
+
+def _target(arg):
+    """The ctypes object behind a byref() argument, or the argument itself."""
+    return getattr(arg, '_obj', arg)
+
+
+def _set(arg, value):
+    _target(arg).value = value
+
+
+class SimulatedLibrary(object):
+    """
+    One simulated EMCCD camera behind the ncCam* API.
+
+    Frames come from a bank of bank_size synthetic images (bias, read noise,
+    Poisson photons with gamma-distributed EM gain, and a Gaussian spot),
+    regenerated when the geometry, gain or shutter changes, so producing a frame costs
+    no more than the driver's own copy. With realtime=True frames arrive every
+    exposure + waiting + readout time (or frame_period seconds if given),
+    otherwise as fast as they are read. Frames not read before nbBuff newer
+    ones arrive are overwritten and reported as skipped, like the driver.
+    """
+    readout_modes = {
+        # mode: (amplifier type, pixel rate [pixels/s])
+        1: (0, 10e6),   # EM
+        2: (1, 1e6),    # conventional
+    }
+
+    def __init__(self, max_width=512, max_height=512, bias=1600, read_noise=4.0,
+                 background=0.02, spot_electrons=0.5, bank_size=4, realtime=True,
+                 frame_period=None, seed=0):
+        self.max_width = max_width
+        self.max_height = max_height
+        self.bias = bias
+        self.read_noise = read_noise
+        self.background = background
+        self.spot_electrons = spot_electrons
+        self.bank_size = bank_size
+        self.realtime = realtime
+        self.frame_period = frame_period
+        self.rng = np.random.default_rng(seed)
+
+        self.nb_buff = 0
+        self.readout_mode = 1
+        self.trigger_mode = 0
+        self.exposure_time = 20.0   # ms
+        self.waiting_time = 0.0     # ms
+        self.timeout = 2000         # ms, -1 waits forever
+        self.shutter_mode = 1
+        self.target_detector_temp = -60.0
+        self.raw_em_gain = 0
+        self.calibrated_em_gain = 1
+        self.bin = 1
+        self.roi = [0, 0, max_width, max_height]
+        self._roi_pending = list(self.roi)
+
+        self._bank = None
+        self._bank_key = None
+        self._image = None
+        self._timestamp = 0.0
+        self._lock = threading.Condition()
+        self._queue = collections.deque()
+        self._skipped = 0
+        self._acquiring = False
+        self._stop = threading.Event()
+        self._thread = None
+
+        # NC_api sets restype/argtypes on each function, which bound methods
+        # do not allow, so export plain functions
+        for name in dir(self):
+            if name.startswith('ncCam'):
+                setattr(self, name, self._export(getattr(self, name)))
+
+    @staticmethod
+    def _export(method):
+        def function(*args):
+            return method(*args)
+        function.__name__ = method.__name__
+        return function
+
+    def __getattr__(self, name):
+        if not name.startswith('ncCam'):
+            raise AttributeError(name)
+        def not_simulated(*args):
+            return ERROR_NOT_SIMULATED
+        not_simulated.__name__ = name
+        return not_simulated
+
+    # Geometry and timing
+
+    @property
+    def image_size(self):
+        """(width, height) of a read out image."""
+        return self.roi[2] // self.bin, self.roi[3] // self.bin
+
+    def readout_time(self):
+        """ms to read out one image at the current mode, ROI and binning."""
+        width, height = self.image_size
+        pixel_rate = self.readout_modes[self.readout_mode][1]
+        # vertical shifts are cheap next to the serial readout of each row
+        return 1e3 * (width * height / pixel_rate + self.roi[3] * 1e-6)
+
+    def frame_interval(self):
+        if self.frame_period is not None:
+            return self.frame_period
+        return 1e-3 * (self.exposure_time + self.waiting_time + self.readout_time())
+
+    def _frame_bank(self):
+        width, height = self.image_size
+        gain = max(self.calibrated_em_gain, 1) if self.readout_mode == 1 else 1
+        # shutter mode 2 is closed: bias and read noise only
+        closed = self.shutter_mode == 2
+        key = (width, height, gain, self.exposure_time, closed)
+        if self._bank_key != key:
+            rows, cols = np.mgrid[0:height, 0:width]
+            # spot at the sensor centre, 1/8 of the sensor wide
+            x = self.roi[0] + (cols + 0.5) * self.bin - self.max_width / 2
+            y = self.roi[1] + (rows + 0.5) * self.bin - self.max_height / 2
+            sigma = self.max_width / 16
+            electrons = self.bin ** 2 * (
+                self.background
+                + self.spot_electrons * np.exp(-(x ** 2 + y ** 2) / (2 * sigma ** 2))
+            ) * self.exposure_time / 20.0 * (not closed)
+            bank = np.empty((self.bank_size, height, width), dtype=np.uint16)
+            for i in range(self.bank_size):
+                photons = self.rng.poisson(electrons)
+                signal = self.rng.gamma(np.maximum(photons, 1), gain) * (photons > 0)
+                noise = self.rng.normal(0, self.read_noise, (height, width))
+                np.clip(self.bias + signal + noise, 0, 65535, out=bank[i], casting='unsafe')
+            self._bank = bank
+            self._bank_key = key
+        return self._bank
+
+    # Acquisition
+
+    def _produce(self, n_images):
+        interval = self.frame_interval()
+        next_frame = time.perf_counter()
+        i = 0
+        while n_images == 0 or i < n_images:
+            if self.realtime:
+                next_frame += interval
+                if self._stop.wait(max(0, next_frame - time.perf_counter())):
+                    break
+            elif self._stop.is_set():
+                break
+            with self._lock:
+                if not self.realtime:
+                    # as fast as they are read, but never overwrite
+                    while len(self._queue) >= self.nb_buff and not self._stop.is_set():
+                        self._lock.wait(0.1)
+                if len(self._queue) >= self.nb_buff:
+                    self._queue.popleft()
+                    self._skipped += 1
+                self._queue.append((i % self.bank_size, time.time()))
+                self._lock.notify_all()
+            i += 1
+        with self._lock:
+            self._acquiring = False
+            self._lock.notify_all()
+
+    def _stop_producer(self):
+        if self._thread is not None:
+            self._stop.set()
+            with self._lock:
+                self._lock.notify_all()
+            self._thread.join()
+            self._thread = None
+        self._acquiring = False
+
+    # ncCam* API, same arguments as the driver functions in NC_api.py
+
+    def ncCamOpen(self, unit, channel, nbBuff, cam):
+        self.nb_buff = max(int(nbBuff), 1)
+        return 0
+
+    def ncCamClose(self, cam):
+        self._stop_producer()
+        return 0
+
+    def ncCamSetReadoutMode(self, cam, mode):
+        if mode not in self.readout_modes:
+            return ERROR_NOT_SIMULATED
+        self.readout_mode = mode
+        return 0
+
+    def ncCamGetNbrReadoutModes(self, cam, nbrModes):
+        _set(nbrModes, len(self.readout_modes))
+        return 0
+
+    def ncCamGetCurrentReadoutMode(self, cam, mode, ampliType, ampliString, vertFreq, horizFreq):
+        _set(mode, self.readout_mode)
+        _set(ampliType, self.readout_modes[self.readout_mode][0])
+        _set(vertFreq, 1000000)
+        _set(horizFreq, int(self.readout_modes[self.readout_mode][1]))
+        return 0
+
+    def ncCamGetReadoutTime(self, cam, readoutTime):
+        _set(readoutTime, self.readout_time())
+        return 0
+
+    def ncCamSetTriggerMode(self, cam, mode, nbrImages):
+        self.trigger_mode = mode
+        return 0
+
+    def ncCamGetTriggerMode(self, cam, cameraCall, mode, nbrImages):
+        _set(mode, self.trigger_mode)
+        return 0
+
+    def ncCamSetExposureTime(self, cam, exposureTime):
+        self.exposure_time = float(exposureTime)
+        return 0
+
+    def ncCamGetExposureTime(self, cam, cameraCall, exposureTime):
+        _set(exposureTime, self.exposure_time)
+        return 0
+
+    def ncCamSetWaitingTime(self, cam, waitingTime):
+        self.waiting_time = float(waitingTime)
+        return 0
+
+    def ncCamGetWaitingTime(self, cam, cameraCall, waitingTime):
+        _set(waitingTime, self.waiting_time)
+        return 0
+
+    def ncCamSetTimeout(self, cam, timeout):
+        self.timeout = int(timeout)
+        return 0
+
+    def ncCamGetTimeout(self, cam, timeout):
+        _set(timeout, self.timeout)
+        return 0
+
+    def ncCamSetShutterMode(self, cam, mode):
+        self.shutter_mode = int(mode)
+        return 0
+
+    def ncCamGetShutterMode(self, cam, cameraCall, mode):
+        _set(mode, self.shutter_mode)
+        return 0
+
+    def ncCamGetSize(self, cam, width, height):
+        w, h = self.image_size
+        _set(width, w)
+        _set(height, h)
+        return 0
+
+    def ncCamGetMaxSize(self, cam, width, height):
+        _set(width, self.max_width)
+        _set(height, self.max_height)
+        return 0
+
+    def ncCamSetMRoiSize(self, cam, index, width, height):
+        self._roi_pending[2:] = [int(width), int(height)]
+        return 0
+
+    def ncCamSetMRoiPosition(self, cam, index, offsetX, offsetY):
+        self._roi_pending[:2] = [int(offsetX), int(offsetY)]
+        return 0
+
+    def ncCamGetMRoiSize(self, cam, index, width, height):
+        _set(width, self.roi[2])
+        _set(height, self.roi[3])
+        return 0
+
+    def ncCamGetMRoiPosition(self, cam, index, offsetX, offsetY):
+        _set(offsetX, self.roi[0])
+        _set(offsetY, self.roi[1])
+        return 0
+
+    def ncCamMRoiApply(self, cam):
+        x, y, w, h = self._roi_pending
+        if x < 0 or y < 0 or w <= 0 or h <= 0 or x + w > self.max_width or y + h > self.max_height:
+            self._roi_pending = list(self.roi)
+            return ERROR_NOT_SIMULATED
+        self.roi = list(self._roi_pending)
+        return 0
+
+    def ncCamMRoiRollback(self, cam):
+        self._roi_pending = list(self.roi)
+        return 0
+
+    def ncCamSetBinningMode(self, cam, binx, biny):
+        if binx != biny or binx < 1:
+            return ERROR_NOT_SIMULATED
+        self.bin = int(binx)
+        return 0
+
+    def ncCamGetBinningMode(self, cam, binx, biny):
+        _set(binx, self.bin)
+        _set(biny, self.bin)
+        return 0
+
+    def ncCamGetComponentTemp(self, cam, component, temp):
+        component = getattr(component, 'value', component)
+        temps = {
+            0: self.target_detector_temp + self.rng.normal(0, 0.05),
+            1: 35.0, 2: 40.0, 3: 45.0, 4: 25.0,
+        }
+        if component not in temps:
+            return ERROR_NOT_SIMULATED
+        _set(temp, temps[component])
+        return 0
+
+    def ncCamGetControllerTemp(self, cam, temp):
+        _set(temp, 35.0)
+        return 0
+
+    def ncCamSetTargetDetectorTemp(self, cam, temp):
+        self.target_detector_temp = float(getattr(temp, 'value', temp))
+        return 0
+
+    def ncCamGetTargetDetectorTemp(self, cam, cameraCall, temp):
+        _set(temp, self.target_detector_temp)
+        return 0
+
+    def ncCamGetTargetDetectorTempRange(self, cam, tempMin, tempMax):
+        _set(tempMin, -85.0)
+        _set(tempMax, 20.0)
+        return 0
+
+    def ncCamSetRawEmGain(self, cam, gain):
+        self.raw_em_gain = int(gain)
+        return 0
+
+    def ncCamGetRawEmGain(self, cam, cameraCall, gain):
+        _set(gain, self.raw_em_gain)
+        return 0
+
+    def ncCamGetRawEmGainRange(self, cam, gainMin, gainMax):
+        _set(gainMin, 0)
+        _set(gainMax, 4095)
+        return 0
+
+    def ncCamSetCalibratedEmGain(self, cam, gain):
+        # accepted in any mode, only the EM mode applies it to the frames
+        self.calibrated_em_gain = min(max(int(gain), 1), 5000)
+        # roughly log-linear raw DAC value for the calibrated gain
+        self.raw_em_gain = int(4095 * np.log(self.calibrated_em_gain) / np.log(5000))
+        return 0
+
+    def ncCamGetCalibratedEmGain(self, cam, cameraCall, gain):
+        _set(gain, self.calibrated_em_gain)
+        return 0
+
+    def ncCamGetCalibratedEmGainRange(self, cam, gainMin, gainMax):
+        _set(gainMin, 1)
+        _set(gainMax, 5000 if self.readout_mode == 1 else 1)
+        return 0
+
+    def ncCamGetCalibratedEmGainTempRange(self, cam, tempMin, tempMax):
+        _set(tempMin, -85.0)
+        _set(tempMax, -40.0)
+        return 0
+
+    def ncCamStart(self, cam, nbrImages):
+        self._stop_producer()
+        with self._lock:
+            self._queue.clear()
+            self._skipped = 0
+            self._acquiring = True
+        self._frame_bank()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._produce, args=(int(nbrImages),), daemon=True)
+        self._thread.start()
+        return 0
+
+    def ncCamAbort(self, cam):
+        self._stop_producer()
+        return 0
+
+    def ncCamIsAcquiring(self, cam, acquiring):
+        _set(acquiring, int(self._acquiring))
+        return 0
+
+    def ncCamFlushReadQueues(self, cam):
+        with self._lock:
+            self._queue.clear()
+            self._skipped = 0
+            self._lock.notify_all()
+        return 0
+
+    def ncCamReadChronological(self, cam, image, nbrImagesSkipped):
+        deadline = None if self.timeout < 0 else time.perf_counter() + self.timeout / 1e3
+        with self._lock:
+            while not self._queue:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return ERROR_TIMEOUT
+                self._lock.wait(remaining)
+            index, self._timestamp = self._queue.popleft()
+            _set(nbrImagesSkipped, self._skipped)
+            self._skipped = 0
+            self._lock.notify_all()
+        self._image = self._bank[index]
+        # point the caller's NcImage* at the frame
+        pointer = _target(image)
+        address = ctypes.c_void_p(self._image.ctypes.data)
+        ctypes.memmove(ctypes.addressof(pointer), ctypes.addressof(address), ctypes.sizeof(address))
+        return 0
+
+    def ncCamGetHostSystemTimestamp(self, cam, image, timestamp):
+        # time.time() when the frame was produced
+        _set(timestamp, self._timestamp)
+        return 0
+
+    def ncCamSaveImage(self, cam, image, name, encode, comment, overwrite):
+        return 0
@@ -0,0 +1,128 @@
+#####################################################################
+#                                                                   #
+# /NuvuCamera/accumulator.py                                        #
+#                                                                   #
+# Running per-sequence sums of the saved frames, flushed to a       #
+# sidecar file so averaged images and noise maps are available      #
+# without reopening every shot.                                     #
+#                                                                   #
+#####################################################################
+
+import os
+import time
+
+import numpy as np
+import h5py
+from labscript_utils.ls_zprocess import Lock
+from labscript_utils.shared_drive import path_to_agnostic
+
+
+def sidecar_path(directory, sequence_id, device_name):
+    return os.path.join(directory, f'{sequence_id}_{device_name}_accumulated.h5')
+
+
+def shot_sidecar_path(h5_filepath, device_name):
+    """Sidecar file of the sequence the shot h5_filepath belongs to."""
+    with h5py.File(h5_filepath, 'r') as f:
+        sequence_id = f.attrs['sequence_id']
+    return sidecar_path(os.path.dirname(h5_filepath), sequence_id, device_name)
+
+
+def load_accumulated(path):
+    """{(name, frametype): {'mean', 'std', 'sum', 'sum_sq', 'count', 'n_shots'}}
+    from a sidecar file, or {} if it does not exist yet."""
+    if not os.path.exists(path):
+        return {}
+    accumulated = {}
+    with h5py.File(path, 'r') as f:
+        for name, group in f.items():
+            for frametype, subgroup in group.items():
+                entry = {k: subgroup[k][:] for k in ('mean', 'std', 'sum', 'sum_sq')}
+                entry['count'] = int(subgroup.attrs['count'])
+                entry['n_shots'] = int(subgroup.attrs['n_shots'])
+                accumulated[(name, frametype)] = entry
+    return accumulated
+
+
+class SequenceAccumulator(object):
+    """Running sum, sum of squares and frame count per (name, frametype) over
+    the shots of one sequence.
+
+    add() is called from the image writer with each exposure's saved frames.
+    flush() writes the aggregate to the sidecar file, replacing it in one
+    step, under the file's zlock, so readers never see a half-written file;
+    maybe_flush() does so at most every flush_interval seconds. A flush that
+    fails, e.g. because another program holds the file open, is logged and
+    retried at the next one.
+    """
+    def __init__(self, path, sequence_id, logger, flush_interval=10.0):
+        self.path = path
+        self.sequence_id = sequence_id
+        self.logger = logger
+        self.flush_interval = flush_interval
+        self.sums = {}
+        self.last_flush = time.monotonic()
+        self.dirty = False
+
+    def add(self, key, frames, run_number=None):
+        """Accumulate frames, one [h, w] frame or a [n, h, w] stack."""
+        frames = np.asarray(frames)
+        if frames.ndim == 2:
+            frames = frames[np.newaxis]
+        entry = self.sums.get(key)
+        if entry is not None and entry['sum'].shape != frames.shape[1:]:
+            self.logger.warning(
+                f"{key} frame shape changed from {entry['sum'].shape} to "
+                f"{frames.shape[1:]}, restarting its accumulation"
+            )
+            entry = None
+        if entry is None:
+            entry = self.sums[key] = {
+                'sum': np.zeros(frames.shape[1:]),
+                'sum_sq': np.zeros(frames.shape[1:]),
+                'count': 0,
+                'runs': set(),
+            }
+        for frame in frames:
+            frame = frame.astype(np.float64)
+            entry['sum'] += frame
+            entry['sum_sq'] += frame * frame
+        entry['count'] += len(frames)
+        entry['runs'].add(run_number)
+        self.dirty = True
+
+    def maybe_flush(self):
+        if self.dirty and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if not self.dirty:
+            return
+        try:
+            self._write()
+        except Exception:
+            self.logger.exception(f"Failed to flush accumulated frames to {self.path}")
+        else:
+            self.dirty = False
+            self.logger.debug(f"Flushed accumulated frames to {self.path}.")
+        self.last_flush = time.monotonic()
+
+    def _write(self):
+        temp_path = self.path + '.tmp'
+        with h5py.File(temp_path, 'w') as f:
+            f.attrs['sequence_id'] = self.sequence_id
+            f.attrs['updated'] = time.time()
+            for (name, frametype), entry in self.sums.items():
+                group = f.require_group(name).create_group(frametype)
+                count = entry['count']
+                mean = entry['sum'] / count
+                variance = np.maximum(entry['sum_sq'] / count - mean * mean, 0)
+                group.create_dataset('mean', data=mean.astype(np.float32))
+                group.create_dataset('std', data=np.sqrt(variance).astype(np.float32))
+                group.create_dataset('sum', data=entry['sum'])
+                group.create_dataset('sum_sq', data=entry['sum_sq'])
+                group.attrs['count'] = count
+                group.attrs['n_shots'] = len(entry['runs'])
+        # the lock h5_lock takes for readers of the sidecar file
+        with Lock(path_to_agnostic(self.path)):
+            os.replace(temp_path, self.path)
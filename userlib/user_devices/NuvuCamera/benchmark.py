@@ -0,0 +1,242 @@
+#####################################################################
+#                                                                   #
+# /NuvuCamera/benchmark.py                                          #
+#                                                                   #
+# Drive NuvuCameraWorker through buffered shots and continuous      #
+# acquisition on the simulated Nuvu SDK and report frame rate,      #
+# post_experiment latency and memory use.                           #
+#                                                                   #
+#   python -m user_devices.NuvuCamera.benchmark --shots 50          #
+#                                                                   #
+# h5_lock needs a zlock server running, as for BLACS itself.        #
+#                                                                   #
+#####################################################################
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import resource
+import tempfile
+import threading
+import time
+
+import numpy as np
+import labscript_utils.h5_lock   # noqa: F401  (must come before h5py)
+import h5py
+import zmq
+
+import labscript_utils.properties
+from labscript_utils.ls_zprocess import Context
+from user_devices.NuvuCamera.Nuvu_sdk import simulated_sdk
+from user_devices.NuvuCamera.latency import format_summary
+
+
+class ImageSink(object):
+    """Stands in for the tab's image receiver: acknowledges every image the
+    worker sends and counts them. The socket comes from the same Context as
+    the worker's, which encrypts when labconfig has a shared secret."""
+    def __init__(self):
+        self.socket = Context().socket(zmq.REP)
+        self.port = self.socket.bind_to_random_port('tcp://127.0.0.1')
+        self.images = 0
+        self.nbytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        poller = zmq.Poller()
+        poller.register(self.socket, zmq.POLLIN)
+        while not self._stop.is_set():
+            if not poller.poll(100):
+                continue
+            metadata, image = self.socket.recv_multipart()
+            self.images += 1
+            self.nbytes += len(image)
+            self.socket.send(b'ok')
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.socket.close()
+
+
+def make_worker(props, port):
+    """Build a NuvuCameraWorker outside BLACS (no worker process) on the simulated SDK."""
+    from user_devices.NuvuCamera.blacs_workers import NuvuCameraWorker
+    worker = NuvuCameraWorker.__new__(NuvuCameraWorker)
+    worker.logger = logging.getLogger('NuvuCamera.benchmark')
+    for k, v in props.items():
+        setattr(worker, k, v)
+    worker.mock = True
+    worker.parent_host = '127.0.0.1'
+    worker.image_receiver_port = port
+    with quiet(False):
+        worker.init()
+    return worker
+
+
+def make_shot_file(path, device_name, n_frames, frame_interval, camera_attributes,
+                   run_number=0, n_runs=1):
+    exposures = np.array(
+        [(i * frame_interval, 'fluorescence', 'frame', 1e-3) for i in range(n_frames)],
+        dtype=[('t', float), ('name', h5py.special_dtype(vlen=str)),
+               ('frametype', h5py.special_dtype(vlen=str)), ('trigger_duration', float)],
+    )
+    with h5py.File(path, 'w') as f:
+        # as runmanager writes them
+        f.attrs['sequence_id'] = 'benchmark'
+        f.attrs['run number'] = run_number
+        f.attrs['n_runs'] = n_runs
+        group = f.require_group(f'/devices/{device_name}')
+        group.create_dataset('EXPOSURES', data=exposures)
+        labscript_utils.properties.set_device_properties(f, device_name, {
+            'camera_attributes': camera_attributes,
+            'stop_acquisition_timeout': 30.0,
+            'exception_on_failed_shot': True,
+            'saved_attribute_visibility_level': None,
+        })
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def summarize(label, samples):
+    a = np.asarray(samples) * 1e3
+    print(f'{label:<24s} mean {a.mean():8.3f} ms   median {np.median(a):8.3f} ms   '
+          f'p95 {np.percentile(a, 95):8.3f} ms   max {a.max():8.3f} ms')
+
+
+def quiet(verbose):
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+def run_buffered(worker, shots, n_frames, camera_attributes, verbose=False):
+    device_name = worker.device_name
+    # NC_api is imported by the worker, after simulated_sdk.enable()
+    from user_devices.NuvuCamera.Nuvu_sdk.NC_api import nuvuLib
+    frame_interval = nuvuLib.frame_interval()
+    timings = {'transition_to_buffered': [], 'acquisition': [], 'post_experiment': [],
+               'transition_to_manual': [], 'cycle': []}
+    dropped = 0
+    size = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(shots):
+            h5_path = os.path.join(tmp, f'shot_{i}.h5')
+            make_shot_file(h5_path, device_name, n_frames, frame_interval, camera_attributes,
+                           i, shots)
+            with quiet(verbose):
+                t0 = time.perf_counter()
+                worker.transition_to_buffered(device_name, h5_path, {}, i == 0)
+                t1 = time.perf_counter()
+                # the RaX BLACS calls post_experiment once the shot has run; wait for
+                # the frames here so its latency excludes the acquisition itself
+                worker.acquisition_thread.join()
+                t2 = time.perf_counter()
+                worker.post_experiment()
+                t3 = time.perf_counter()
+                worker.transition_to_manual()
+                t4 = time.perf_counter()
+            timings['transition_to_buffered'].append(t1 - t0)
+            timings['acquisition'].append(t2 - t1)
+            timings['post_experiment'].append(t3 - t2)
+            timings['transition_to_manual'].append(t4 - t3)
+            timings['cycle'].append(t4 - t0)
+            with h5py.File(h5_path, 'r') as f:
+                dropped += int(f[f'images/{device_name}'].attrs.get('dropped_frames', 0))
+            size = os.path.getsize(h5_path)
+            os.remove(h5_path)
+
+    fps = n_frames / np.median(timings['acquisition'])
+    print(f'{shots} shots x {n_frames} frames, compression={worker.image_compression}, '
+          f'kinetic_mode={worker.kinetic_mode}, accumulate={worker.accumulate}, dark_subtraction={worker.dark_subtraction}, '
+          f'{fps:.1f} frames/s acquired, {dropped} dropped, shot file {size / 1e6:.2f} MB')
+    for label, samples in timings.items():
+        summarize(label, samples)
+    print('per-frame latency (ms):')
+    print(format_summary(worker.get_latency_stats()['total']))
+    return timings
+
+
+def run_continuous(worker, sink, seconds, verbose=False):
+    images_before = sink.images
+    with quiet(verbose):
+        worker.start_continuous(0)
+        time.sleep(seconds)
+        stats = worker.get_preview_stats()
+        worker.stop_continuous()
+    print(f'continuous {seconds:.1f} s: {stats["acquired"] / seconds:.1f} frames/s acquired, '
+          f'{(sink.images - images_before) / seconds:.1f} frames/s displayed, '
+          f'{stats["dropped"]} dropped (preview_rate={worker.preview_rate}, '
+          f'downsample={worker.preview_downsample})')
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='NuvuCameraWorker simulated SDK benchmark')
+    parser.add_argument('--shots', type=int, default=20)
+    parser.add_argument('--frames', type=int, default=10, help='exposures per shot')
+    parser.add_argument('--exposure-time', type=float, default=20.0, help='ms')
+    parser.add_argument('--roi', type=int, nargs=4, default=None,
+                        metavar=('X', 'Y', 'WIDTH', 'HEIGHT'))
+    parser.add_argument('--bin', type=int, default=1)
+    parser.add_argument('--nb-buffers', type=int, default=4)
+    parser.add_argument('--kinetic', action='store_true', help='kinetic_mode=True')
+    parser.add_argument('--dark', choices=['worker', 'analysis'], default=None,
+                        help='dark_subtraction mode')
+    parser.add_argument('--accumulate', action='store_true', help='accumulate=True')
+    parser.add_argument('--compression', choices=['gzip', 'gzip1', 'lzf', 'none'], default='gzip')
+    parser.add_argument('--frame-period', type=float, default=None,
+                        help='s between simulated frames (default: exposure + readout)')
+    parser.add_argument('--no-realtime', action='store_true',
+                        help='frames arrive as fast as they are read')
+    parser.add_argument('--continuous', type=float, default=5.0,
+                        help='s of continuous acquisition to run (0 to skip)')
+    parser.add_argument('--preview-rate', type=float, default=10.0)
+    parser.add_argument('--preview-downsample', type=int, default=1)
+    parser.add_argument('--verbose', action='store_true', help='show worker logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    simulated_sdk.enable(realtime=not args.no_realtime, frame_period=args.frame_period)
+
+    camera_attributes = {
+        'exposure_time': args.exposure_time,
+        'square_bin': args.bin,
+        'roi': args.roi,
+    }
+    props = {
+        'device_name': 'nuvu',
+        'serial_number': 0,
+        'orientation': None,
+        'camera_attributes': camera_attributes,
+        'manual_mode_camera_attributes': {},
+        'nb_buffers': args.nb_buffers,
+        'kinetic_mode': args.kinetic,
+        'accumulate': args.accumulate,
+        'image_compression': None if args.compression == 'none' else args.compression,
+        'preview_rate': args.preview_rate,
+        'preview_downsample': args.preview_downsample,
+    }
+
+    if args.dark is not None:
+        dark_dir = tempfile.TemporaryDirectory()
+        props['dark_subtraction'] = args.dark
+        props['dark_library_path'] = os.path.join(dark_dir.name, 'dark_frames.h5')
+
+    sink = ImageSink()
+    rss_start = max_rss_mb()
+    worker = make_worker(props, sink.port)
+    try:
+        run_buffered(worker, args.shots, args.frames, camera_attributes, args.verbose)
+        if args.continuous:
+            run_continuous(worker, sink, args.continuous, args.verbose)
+    finally:
+        with quiet(args.verbose):
+            worker.shutdown()
+        sink.close()
+    print(f'peak RSS {max_rss_mb():.1f} MB (started at {rss_start:.1f} MB), '
+          f'{sink.images} images / {sink.nbytes / 1e6:.1f} MB sent to the GUI')
@@ -12,16 +12,89 @@
 #####################################################################
 
 from labscript_devices.IMAQdxCamera.blacs_tabs import IMAQdxCameraTab
+from blacs.device_base_class import define_state, MODE_MANUAL
+from qtutils.qt import QtWidgets, QtGui
+
+from .latency import format_summary
 
 import pickle
 
 class NuvuCameraTab(IMAQdxCameraTab):
     worker_class = 'user_devices.NuvuCamera.blacs_workers.NuvuCameraWorker'
+    # ms between camera temperature reads, the rest of the camera state is cached
+    temperature_poll_interval = 10000
+    # connection table properties passed to the worker on top of the IMAQdxCamera ones
+    extra_worker_properties = (
+        'image_compression', 'preview_rate', 'preview_downsample', 'nb_buffers',
+        'kinetic_mode', 'dark_subtraction', 'dark_library_path', 'dark_max_age',
+        'dark_n_frames', 'dark_temperature_band', 'accumulate', 'accumulate_flush_interval',
+        'telemetry_path', 'telemetry_interval',
+    )
+    # ms between updates of the continuous preview frame counters
+    preview_stats_interval = 1000
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
         self.connect_restart_receiver(self.on_restart)
+        self.statemachine_timeout_add(self.temperature_poll_interval, self.poll_temperatures)
+        self.statemachine_timeout_add(self.preview_stats_interval, self.update_preview_stats)
+
+    def initialise_GUI(self):
+        super().initialise_GUI()
+        self.pushButton_dark = QtWidgets.QPushButton('Dark frame')
+        self.pushButton_dark.setToolTip(
+            'Take a new master dark frame (shutter closed) at the current settings'
+        )
+        self.pushButton_dark.clicked.connect(self.on_dark_clicked)
+        self.ui.verticalLayout.insertWidget(
+            self.ui.verticalLayout.indexOf(self.ui.pushButton_stop) + 1, self.pushButton_dark
+        )
+        self.pushButton_latency = QtWidgets.QPushButton('Latency')
+        self.pushButton_latency.setToolTip('Per-frame latencies of buffered shots')
+        self.pushButton_latency.clicked.connect(self.on_latency_clicked)
+        self.ui.verticalLayout.insertWidget(
+            self.ui.verticalLayout.indexOf(self.pushButton_dark) + 1, self.pushButton_latency
+        )
+
+    def create_worker(self, name, WorkerClass, workerargs=None):
+        workerargs = dict(workerargs or {})
+        properties = self.settings['connection_table'].find_by_name(self.device_name).properties
+        for key in self.extra_worker_properties:
+            if key in properties:
+                workerargs[key] = properties[key]
+        return super().create_worker(name, WorkerClass, workerargs)
+
+    @define_state(MODE_MANUAL, True)
+    def poll_temperatures(self):
+        yield(self.queue_work(self.primary_worker, 'poll_temperatures'))
+
+    @define_state(MODE_MANUAL, queue_state_indefinitely=True, delete_stale_states=True)
+    def on_dark_clicked(self, button):
+        yield(self.queue_work(self.primary_worker, 'refresh_dark_frame'))
+
+    @define_state(MODE_MANUAL, True)
+    def on_latency_clicked(self, button):
+        stats = yield(self.queue_work(self.primary_worker, 'get_latency_stats'))
+        text = 'Since start-up (ms):\n' + format_summary(stats['total'])
+        if stats['last_shot'] is not None:
+            text += '\n\nLast shot (ms):\n' + format_summary(stats['last_shot'])
+        message = QtWidgets.QMessageBox(self.ui)
+        message.setWindowTitle(f'{self.device_name} frame latency')
+        message.setText(text)
+        message.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        message.show()
+
+    @define_state(MODE_MANUAL, True)
+    def update_preview_stats(self):
+        # only while continuous acquisition is running (fps indicator shown)
+        if not self.ui.label_fps.isVisible():
+            return
+        stats = yield(self.queue_work(self.primary_worker, 'get_preview_stats'))
+        self.ui.label_fps.setToolTip(
+            f"{stats['displayed']} displayed, {stats['dropped']} dropped "
+            f"of {stats['acquired']} acquired frames"
+        )
     
     def on_restart(self, device_name):
         worker_task = self.queue_work(self.primary_worker, 'restart_close')
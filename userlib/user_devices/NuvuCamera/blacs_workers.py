@@ -1,5 +1,5 @@
 from zprocess import rich_print
-from labscript_devices.IMAQdxCamera.blacs_workers import MockCamera, IMAQdxCameraWorker
+from labscript_devices.IMAQdxCamera.blacs_workers import IMAQdxCameraWorker
 
 from labscript_utils import dedent
 from labscript_utils.properties import set_attributes
@@ -7,25 +7,61 @@ import numpy as np
 import sys
 import h5py
 import json
+import os
 
 import threading
+import time
+
+from .image_writer import ImageWriter
+from .frame_processing import CONFIG_KEY, validate_config, process_frames
+from .kinetic_series import KineticSeries
+from .dark_frames import DarkFrameLibrary
+from .accumulator import SequenceAccumulator, sidecar_path
+from .telemetry import TelemetryLog, telemetry_row
+from .latency import LatencyHistograms
+
+def _decode_key(name, frametype):
+    """(name, frametype) of an EXPOSURES row as str, h5py may give bytes."""
+    return tuple(v.decode() if isinstance(v, bytes) else v for v in (name, frametype))
+
 
 class NuvuCamera(object):
 
-    def __init__(self, logger):
+    def __init__(self, logger, nb_buffers=4, simulated=False):
         global NuvuCam
+        if simulated:
+            # synthetic frames from a stand-in for the driver library
+            from .Nuvu_sdk import simulated_sdk
+            if not simulated_sdk.enabled():
+                simulated_sdk.enable()
         from .Nuvu_sdk.Nuvu_cam_utils import NuvuCamUtils
         self.logger = logger
 
         self.logger.debug("Trying to establish connection to Nuvu Cam")
-        self.camera_utils = NuvuCamUtils(logger)
+        self.camera_utils = NuvuCamUtils(logger, nb_buffers=nb_buffers)
         self.initialized = False # we have not set the acquisition_attributes until we have called set_attributes the first time
         self.logger.debug("Connection Successful")
 
-        self.attributes = self.camera_utils.default_acquisition_attributes
+        self.attributes = dict(self.camera_utils.default_acquisition_attributes)
+        # values last programmed into the camera, used to skip unchanged attributes.
+        # The worker's smart_cache already drops unchanged values, but it is
+        # keyed on what was requested, not on what the camera holds: it does
+        # not know that e.g. a readout mode change resets the exposure time
+        # (camera_utils.attribute_dependents), and it keeps values whose
+        # programming failed. Cleared by the worker on fresh, like smart_cache.
+        self.applied_attributes = {}
         
         self.exception_on_failed_shot = True
         self._abort_acquisition = False  
+        # filled by grab_multiple: (sequence number, host timestamp) per frame
+        # read, and the number of frames the driver overwrote before they were read
+        self.frame_info = []
+        self.dropped_frames = 0
+        # kinetic mode: a KineticSeries that grab_multiple writes frames to as
+        # they arrive, instead of keeping them in the images list
+        self.frame_sink = None
+        # LatencyHistograms of the frames grab_multiple read in the last shot
+        self.latency = LatencyHistograms()
 
     def set_attributes(self, attr_dict):
         self.attributes.update(attr_dict)
@@ -33,11 +69,28 @@ class NuvuCamera(object):
             # If not initialized, need to set all the attribute values to the camera
             attr_dict = self.attributes
             self.initialized = True
-        self.camera_utils.set_attributes(attr_dict)
+        changed = {
+            name: value for name, value in attr_dict.items()
+            if name not in self.applied_attributes or self.applied_attributes[name] != value
+        }
+        for name in list(changed):
+            for dependent in self.camera_utils.attribute_dependents.get(name, ()):
+                if dependent in self.attributes and dependent not in changed:
+                    changed[dependent] = self.attributes[dependent]
+        if not changed:
+            self.logger.debug("camera attributes unchanged, nothing to program")
+            return
+        self.logger.debug(f"programming changed camera attributes: {changed}")
+        try:
+            self.camera_utils.set_attributes(changed)
+        except Exception:
+            # camera state unknown, program everything next time
+            self.applied_attributes = {}
+            raise
+        self.applied_attributes.update(changed)
     
     def set_attribute(self, name, value):
-        self.attributes[name] = value
-        self.camera_utils.set_attrs({name: value})
+        self.set_attributes({name: value})
 
     def get_attribute_names(self, visibility_level, writeable_only=True):
         return list(self.attributes.keys())
@@ -64,7 +117,8 @@ class NuvuCamera(object):
         self.logger.debug("configured acquisition")
     
     def get_cam_data(self): #added by Shungo, 02/25/2025
-        Camera_all_info = self.camera_utils.getAllCamInfo() # This gives a dictionary
+        # cached camera state, no SDK calls; temperatures come from the last poll
+        Camera_all_info = self.camera_utils.cam_info # This gives a dictionary
         cam_data = np.zeros(5)
         cam_data[0] = float(Camera_all_info['componentTemp']['detectorTemp'])
         cam_data[1] = float(Camera_all_info['rawEmGain'])
@@ -73,28 +127,91 @@ class NuvuCamera(object):
         cam_data[4] = int(Camera_all_info['currentReadoutMode'])
         return cam_data
 
-
-    # used for grabbing during buffered
+    def get_readout_geometry(self):
+        """ROI [offset_x, offset_y, width, height] in unbinned sensor pixels and
+        [binx, biny] of the images currently read out, from the cached state."""
+        cam_info = self.camera_utils.cam_info
+        return {'readout_roi': cam_info['roi'], 'readout_binning': cam_info['binning']}
+
+    def acquire_dark_frame(self, n_frames):
+        """Mean of n_frames frames taken with the shutter closed and internal
+        triggering at the current readout settings, as float32. Trigger and
+        shutter modes are restored afterwards."""
+        restore = {name: self.attributes[name] for name in ('trigger_mode', 'shutter_mode')}
+        self.set_attributes({'trigger_mode': 0, 'shutter_mode': 2})
+        try:
+            self.configure_acquisition(continuous=False, bufferCount=n_frames)
+            total = np.zeros(self.camera_utils.image_shape, dtype=np.float64)
+            for _ in range(n_frames):
+                image = self.camera_utils.get_queued_image_view()
+                total += image
+                self.release(image)
+            self.camera_utils.cam_stop()
+        finally:
+            self.set_attributes(restore)
+        return (total / n_frames).astype(np.float32)
+
+    def poll_temperatures(self):
+        self.camera_utils.poll_temperatures()
+
+    def get_telemetry(self, shot=''):
+        """Telemetry log row from the cached camera state, no SDK calls."""
+        return telemetry_row(self.camera_utils.cam_info, self.temperature_age(), shot)
+
+    def temperature_age(self):
+        return self.camera_utils.temperature_age()
+
+
+    # used for grabbing during buffered. Returns a view into the frame ring,
+    # hand it back with release() once it has been saved
     def grab(self):
-        print("grab in user_devices/NuvuCamera/Nuvu_sdk/blacs_workers.py")
-        return self.camera_utils.get_queued_image()
+        return self.camera_utils.get_queued_image_view()
     
-    # used for grabbing continuous
+    # used for grabbing continuous, also a frame ring view
     def grab_most_recent(self):
-        return self.camera_utils.get_image()
+        return self.camera_utils.get_image_view()
+
+    def release(self, image):
+        self.camera_utils.release_image(image)
     
     # TODO: verify that the triggers are slower than the read out time
     # Begin acquisition for BUFFERED
     def grab_multiple(self, n_images, images, waitForNextBuffer=True):
-        for i in range(n_images):
-            while True:
-                if self._abort_acquisition:
-                    self.logger.debug("Abort during acquisition.")
-                    self._abort_acquisition = False
-                    return
-                images.append(self.grab())
-                self.logger.debug(f"Got image {i+1} of {n_images}.")
-                break
+        sink = self.frame_sink
+        # one ring frame per kept image so none is reused before post_experiment
+        # saves it, frames written to the sink go straight back to the ring
+        self.camera_utils.reserve_frames(n_images - (sink.n_frames if sink else 0))
+        self.frame_info = []
+        self.dropped_frames = 0
+        self.latency = latency = LatencyHistograms()
+        last_read_time = None
+        # Frames are read oldest first. Frames the driver overwrote still count
+        # towards n_images, so an overrun gives a short shot instead of a timeout
+        sequence = 0
+        while sequence < n_images:
+            if self._abort_acquisition:
+                self.logger.debug("Abort during acquisition.")
+                self._abort_acquisition = False
+                return
+            image = self.grab()
+            skipped, timestamp = self.camera_utils.last_frame_info()
+            read_time, copy_time = self.camera_utils.last_frame_times()
+            if skipped:
+                self.logger.warning(f"{skipped} frame(s) overwritten before they were read.")
+                self.dropped_frames += skipped
+                sequence += skipped
+            if sink and sink.add(image, sequence, timestamp):
+                self.release(image)
+            else:
+                images.append(image)
+                self.frame_info.append((sequence, timestamp))
+            handoff_time = time.perf_counter()
+            if last_read_time is not None:
+                latency.record('read_interval', read_time - last_read_time)
+            last_read_time = read_time
+            latency.record('read_to_copy', copy_time - read_time)
+            latency.record('copy_to_handoff', handoff_time - copy_time)
+            sequence += 1
     
     def start_continuous_acquisition(self, fps):
         # TODO: set trigger attribute to internal
@@ -123,28 +240,257 @@ class NuvuCamera(object):
 class NuvuCameraWorker(IMAQdxCameraWorker):
 
     interface_class = NuvuCamera
+    # HDF5 filter for saved images, set from the connection table. Images are
+    # chunked one frame per chunk whatever the codec
+    image_compression = 'gzip'
+    compression_options = {
+        'gzip': {'compression': 'gzip'},
+        'gzip1': {'compression': 'gzip', 'compression_opts': 1},
+        'lzf': {'compression': 'lzf'},
+        None: {},
+    }
+    # Continuous mode preview, set from the connection table: max frames/s sent
+    # to the GUI, and keep every nth row and column of the frames sent
+    preview_rate = 10.0
+    preview_downsample = 1
+    # SDK frame buffers, set from the connection table
+    nb_buffers = 4
+    # Write exposures sharing a name and frametype to disk as they arrive (see
+    # kinetic_series.py), set from the connection table
+    kinetic_mode = False
+    # Master dark frames (see dark_frames.py), set from the connection table.
+    # dark_subtraction: None, 'worker' (save float32 frames with the master
+    # frame subtracted) or 'analysis' (save raw frames linked to it)
+    dark_subtraction = None
+    dark_library_path = None
+    dark_max_age = 3600.0
+    dark_n_frames = 20
+    dark_temperature_band = 2.0
+    # Keep running sums of the saved frames per sequence and write them to a
+    # sidecar file next to the shots (see accumulator.py), set from the
+    # connection table
+    accumulate = False
+    accumulate_flush_interval = 10.0
+    # HDF5 file camera telemetry is appended to, one row per shot and at most
+    # one per telemetry_interval seconds between shots (see telemetry.py), set
+    # from the connection table
+    telemetry_path = None
+    telemetry_interval = 60.0
+
+    def init(self):
+        self.image_writer = ImageWriter(self.logger)
+        self._image_socket_lock = threading.Lock()
+        # whether transition_to_manual has run for the current shot, see post_experiment
+        self._manual_done = True
+        # per-exposure reductions, from the frame_processing camera_attributes entry
+        self.frame_processing = None
+        # this shot's KineticSeries in kinetic mode, None otherwise
+        self.kinetic_series = None
+        self.dark_library = DarkFrameLibrary(
+            self.dark_library_path, self.dark_max_age, self.dark_temperature_band
+        )
+        # master dark frame for the current shot, and whether set_attributes_smart
+        # should look it up (transition_to_buffered sets this)
+        self.dark_frame = None
+        self._dark_frame_pending = False
+        # this sequence's SequenceAccumulator, only used by the image writer
+        self.accumulator = None
+        self.telemetry = TelemetryLog(self.telemetry_path) if self.telemetry_path else None
+        self._telemetry_recorded = -np.inf
+        # per-frame latencies of buffered shots, since start-up (or the last
+        # reset from the tab) and of the last shot
+        self.latency_total = LatencyHistograms()
+        self.latency_last_shot = None
+        # continuous mode preview: the acquisition loop leaves the newest frame in
+        # _preview_pending and the sender thread sends it at up to preview_rate
+        self._preview_lock = threading.Lock()
+        self._preview_ready = threading.Event()
+        self._preview_stop = threading.Event()
+        self._preview_pending = None
+        self._preview_thread = None
+        self.preview_stats = {'acquired': 0, 'displayed': 0, 'dropped': 0}
+        super().init()
+
+    def set_attributes_smart(self, attributes):
+        # The frame_processing entry configures this worker, not the camera
+        attributes = dict(attributes)
+        if CONFIG_KEY in attributes:
+            config = attributes.pop(CONFIG_KEY)
+            validate_config(config)
+            self.frame_processing = config
+        super().set_attributes_smart(attributes)
+        if self._dark_frame_pending:
+            # transition_to_buffered has just programmed the shot's attributes and
+            # starts acquiring next, so this is where the camera is free to take
+            # a master frame at exactly the shot's settings
+            self._dark_frame_pending = False
+            self.dark_frame = self._get_dark_frame()
+
+    def _get_dark_frame(self):
+        """Master dark frame for the current camera settings, acquired if the
+        library has none or it is stale."""
+        key = self.dark_library.key(self.camera.camera_utils.cam_info)
+        dark = self.dark_library.lookup(key)
+        if dark is not None and not self.dark_library.is_stale(dark):
+            return dark
+        self.logger.info(f"Acquiring master dark frame for {key}.")
+        try:
+            return self._acquire_dark_frame(key)
+        except Exception:
+            if dark is None:
+                raise
+            self.logger.exception(f"Using stale master dark frame from {dark.age():.0f} s ago")
+            return dark
+
+    def _acquire_dark_frame(self, key):
+        frame = self.camera.acquire_dark_frame(self.dark_n_frames)
+        detector_temp = self.camera.camera_utils.cam_info['componentTemp']['detectorTemp']
+        return self.dark_library.add(key, frame, self.dark_n_frames, detector_temp)
+
+    def refresh_dark_frame(self):
+        """Acquire a new master dark frame for the current (manual mode) camera
+        settings and show it in the GUI. Called from the tab."""
+        continuous_dt = self.continuous_dt
+        if self.continuous_thread is not None:
+            self.stop_continuous(pause=True)
+        try:
+            self.camera.poll_temperatures()
+            key = self.dark_library.key(self.camera.camera_utils.cam_info)
+            dark = self._acquire_dark_frame(key)
+        finally:
+            if continuous_dt is not None:
+                self.start_continuous(continuous_dt)
+        if continuous_dt is None:
+            self._send_image_to_parent(dark.frame)
+        return True
+
+    def _send_image_to_parent(self, image):
+        # the image writer and the continuous loop share the REQ socket
+        with self._image_socket_lock:
+            super()._send_image_to_parent(image)
+
+    def _flush_images(self):
+        """Barrier: wait until every handed-off shot is written and previewed."""
+        if self.image_writer.pending:
+            self.logger.debug("Waiting for image writer to finish.")
+        self.image_writer.flush()
 
     def get_camera(self):
         """ Andor cameras may not be specified by serial numbers"""
-        if self.mock:
-            return MockCamera()
-        else:
-            return self.interface_class(self.logger)
+        # mock runs the full Nuvu stack on the simulated SDK
+        return self.interface_class(self.logger, nb_buffers=self.nb_buffers, simulated=self.mock)
             
     def get_attributes_as_dict(self, visibility_level):
         """Return a dict of the attributes of the camera for the given visibility
         level"""
         return self.camera.attributes
 
+    def _release_images(self, images):
+        """Hand frame ring views back to the camera once they are saved/sent."""
+        release = getattr(self.camera, 'release', None)
+        if release is None or images is None:
+            return
+        for image in images:
+            release(image)
+
+    def poll_temperatures(self):
+        """Called from the tab on a slow timer in manual mode."""
+        poll = getattr(self.camera, 'poll_temperatures', None)
+        if poll is not None:
+            poll()
+        if (self.telemetry is not None
+                and time.monotonic() - self._telemetry_recorded >= self.telemetry_interval):
+            self._telemetry_recorded = time.monotonic()
+            try:
+                self.telemetry.append(self.camera.get_telemetry())
+            except Exception:
+                self.logger.exception("Failed to append to the telemetry log")
+        if self.accumulator is not None and self.accumulator.dirty:
+            # retry a sidecar flush that failed after the sequence's last shot,
+            # on the image writer thread that adds to the accumulator
+            self.image_writer.submit(self.accumulator.maybe_flush)
+        return True
+
     def continuous_loop(self):
         while True:
             image = self.camera.grab_most_recent()
-            self._send_image_to_parent(image)
+            self._queue_preview(image)
 
             if self.continuous_stop.is_set():
                 self.continuous_stop.clear()
                 break
 
+    def _queue_preview(self, image):
+        """Make image the next preview frame, dropping the one not yet sent."""
+        with self._preview_lock:
+            dropped, self._preview_pending = self._preview_pending, image
+            self.preview_stats['acquired'] += 1
+            if dropped is not None:
+                self.preview_stats['dropped'] += 1
+        if dropped is not None:
+            self._release_images([dropped])
+        self._preview_ready.set()
+
+    def _preview_loop(self):
+        """Send the newest acquired frame to the GUI, at most preview_rate times
+        a second. Sending waits for the GUI to acknowledge, so while it lags
+        newer frames replace the pending one instead of queueing."""
+        interval = 1 / self.preview_rate
+        step = int(self.preview_downsample)
+        next_send = time.perf_counter()
+        while True:
+            self._preview_ready.wait()
+            # hold off to the target rate, frames arriving meanwhile replace this one
+            if self._preview_stop.wait(max(0, next_send - time.perf_counter())):
+                break
+            with self._preview_lock:
+                image, self._preview_pending = self._preview_pending, None
+                self._preview_ready.clear()
+            if image is None:
+                continue
+            next_send = time.perf_counter() + interval
+            try:
+                if step > 1:
+                    self._send_image_to_parent(np.ascontiguousarray(image[::step, ::step]))
+                else:
+                    self._send_image_to_parent(image)
+                self.preview_stats['displayed'] += 1
+            except Exception:
+                self.logger.exception("Failed to send preview frame")
+            finally:
+                self._release_images([image])
+
+    def _stop_preview(self):
+        self._preview_stop.set()
+        self._preview_ready.set()
+        self._preview_thread.join()
+        self._preview_thread = None
+        with self._preview_lock:
+            image, self._preview_pending = self._preview_pending, None
+        if image is not None:
+            self._release_images([image])
+        self.logger.debug(
+            "Continuous preview: %(acquired)d frames acquired, %(displayed)d "
+            "displayed, %(dropped)d dropped", self.preview_stats
+        )
+
+    def get_latency_stats(self, reset=False):
+        """Latency summaries of buffered frames, {'total': ..., 'last_shot': ...}
+        (see LatencyHistograms.summary). Called from the tab; reset starts the
+        totals again."""
+        stats = {
+            'total': self.latency_total.summary(),
+            'last_shot': self.latency_last_shot.summary() if self.latency_last_shot else None,
+        }
+        if reset:
+            self.latency_total = LatencyHistograms()
+        return stats
+
+    def get_preview_stats(self):
+        """Frames acquired, displayed and dropped since continuous acquisition
+        was last started."""
+        return dict(self.preview_stats)
+
     def start_continuous(self, dt):
         """Begin continuous acquisition in a thread with minimum repetition interval
         dt"""
@@ -153,6 +499,11 @@ class NuvuCameraWorker(IMAQdxCameraWorker):
         fps = float(1/dt) if dt != 0 else 0
         self.camera.start_continuous_acquisition(fps)
 
+        self.preview_stats = {'acquired': 0, 'displayed': 0, 'dropped': 0}
+        self._preview_stop.clear()
+        self._preview_ready.clear()
+        self._preview_thread = threading.Thread(target=self._preview_loop, daemon=True)
+        self._preview_thread.start()
         self.continuous_thread = threading.Thread(
             target=self.continuous_loop, daemon=True
         )
@@ -164,6 +515,7 @@ class NuvuCameraWorker(IMAQdxCameraWorker):
         self.continuous_stop.set()
         self.continuous_thread.join()
         self.continuous_thread = None
+        self._stop_preview()
         self.camera.stop_continuous_acquisition()
 
         if not pause:
@@ -191,9 +543,103 @@ class NuvuCameraWorker(IMAQdxCameraWorker):
         self.logger.debug("Stopping acquisition.")
         self.camera.stop_acquisition()
 
-        self.logger.debug(f"Saving {len(self.images)}/{len(self.exposures)} images.")
+        self.logger.debug(f"Handing off {len(self.images)}/{len(self.exposures)} images.")
+
+        # Camera settings for /data/cam_info come from the cached camera state
+        cam_data = self.camera.get_cam_data()
+        temperature_age = self.camera.temperature_age()
+        get_geometry = getattr(self.camera, 'get_readout_geometry', None)
+        geometry = get_geometry() if get_geometry is not None else None
+        # per-frame sequence numbers and timestamps (not available from MockCamera)
+        frame_info = getattr(self.camera, 'frame_info', None)
+        dropped_frames = getattr(self.camera, 'dropped_frames', None)
+        latency = getattr(self.camera, 'latency', None)
+        if latency is not None:
+            self.latency_total.merge(latency)
+            self.latency_last_shot = latency
+        telemetry = None
+        if self.telemetry is not None:
+            telemetry = self.camera.get_telemetry(os.path.basename(self.h5_filepath))
+        self.image_writer.submit(
+            self._save_images, self.h5_filepath, self.images, self.exposures,
+            self.attributes_to_save, cam_data, temperature_age, self.frame_processing,
+            geometry, frame_info, dropped_frames, self.kinetic_series, self.dark_frame,
+            telemetry, latency,
+        )
+        self.camera.frame_sink = None
+        self.kinetic_series = None
+        self.dark_frame = None
+
+        self.images = None
+        self.n_images = None
+        self.attributes_to_save = None
+        self.exposures = None
+        self.h5_filepath = None
+        self.stop_acquisition_timeout = None
+        self.exception_on_failed_shot = None
+        if self._manual_done:
+            # transition_to_manual already ran, this is the last call before the
+            # shot file is released
+            self._flush_images()
+        return True
 
-        with h5py.File(self.h5_filepath, 'r+') as f:
+    def _save_frame_results(self, f, frame_results, config):
+        """Write per-exposure reductions to /results/<camera>, named
+        <name>_<frametype>_<result>: attributes (lyse scalars) when the exposure
+        has one frame, datasets when it has several."""
+        group = f.require_group('/results/' + self.device_name)
+        group.attrs[CONFIG_KEY] = json.dumps(config)
+        for (name, frametype), results in frame_results.items():
+            for key, values in results.items():
+                label = f'{name}_{frametype}_{key}'
+                if len(values) == 1:
+                    group.attrs[label] = values[0]
+                else:
+                    if label in group:
+                        del group[label]
+                    group.create_dataset(label, data=values)
+
+    def _get_accumulator(self, h5_filepath, file_attrs):
+        """The SequenceAccumulator for the sequence the shot belongs to, starting
+        a new one (and flushing the last) when the sequence changes. None for
+        shots not made by runmanager."""
+        sequence_id = file_attrs.get('sequence_id')
+        if sequence_id is None:
+            return None
+        if isinstance(sequence_id, bytes):
+            sequence_id = sequence_id.decode()
+        if self.accumulator is None or self.accumulator.sequence_id != sequence_id:
+            if self.accumulator is not None:
+                self.accumulator.flush()
+            path = sidecar_path(os.path.dirname(h5_filepath), sequence_id, self.device_name)
+            self.accumulator = SequenceAccumulator(
+                path, sequence_id, self.logger, self.accumulate_flush_interval
+            )
+        return self.accumulator
+
+    def _save_images(self, h5_filepath, images_acquired, exposures, attributes_to_save,
+                     cam_data, temperature_age, frame_processing=None, geometry=None,
+                     frame_info=None, dropped_frames=None, kinetic_series=None,
+                     dark_frame=None, telemetry=None, latency=None):
+        """Image writer job: save a shot's frames, camera info and frame
+        processing results, then send the preview to the GUI and release the
+        frames."""
+        frame_results = {}
+        n_acquired = len(images_acquired)
+        kinetic_keys = set()
+        if kinetic_series is not None:
+            n_acquired += kinetic_series.frames_written
+            kinetic_keys = set(kinetic_series.indices)
+        self.logger.debug(f"Saving {n_acquired}/{len(exposures)} images.")
+        storage = self.compression_options[self.image_compression]
+        # frames are saved as float32 with the master dark frame subtracted in
+        # 'worker' mode, as raw uint16 otherwise
+        subtract = self.dark_subtraction == 'worker' and dark_frame is not None
+
+        with h5py.File(h5_filepath, 'r+') as f:
+            accumulator = self._get_accumulator(h5_filepath, f.attrs) if self.accumulate else None
+            run_number = f.attrs.get('run number')
+            n_runs = f.attrs.get('n_runs')
             # Use orientation for image path, device_name if orientation unspecified
             if self.orientation is not None:
                 image_path = 'images/' + self.orientation
@@ -203,67 +649,175 @@ class NuvuCameraWorker(IMAQdxCameraWorker):
             image_group.attrs['camera'] = self.device_name
 
             # Save camera attributes to the HDF5 file:
-            if self.attributes_to_save is not None:
-                set_attributes(image_group, self.attributes_to_save)
+            if attributes_to_save is not None:
+                set_attributes(image_group, attributes_to_save)
+
+            # Where on the sensor the saved images come from, so analysis does
+            # not have to assume a full, unbinned frame:
+            if geometry is not None:
+                for key, value in geometry.items():
+                    image_group.attrs[key] = value
 
             # Whether we failed to get all the expected exposures:
-            image_group.attrs['failed_shot'] = len(self.images) != len(self.exposures)
+            image_group.attrs['failed_shot'] = n_acquired != len(exposures)
+            if dropped_frames is not None:
+                # frames the driver overwrote before they could be read
+                image_group.attrs['dropped_frames'] = dropped_frames
+            if dark_frame is not None:
+                image_group.attrs['dark_subtraction'] = 'worker' if subtract else 'analysis'
+                self.dark_library.link(image_group, dark_frame)
 
             # key the images by name and frametype. Allow for the case of there being
             # multiple images with the same name and frametype. In this case we will
             # save an array of images in a single dataset.
             images = {
                 (exposure['name'], exposure['frametype']): []
-                for exposure in self.exposures
+                for exposure in exposures
+                if _decode_key(exposure['name'], exposure['frametype']) not in kinetic_keys
             }
 
             # Iterate over expected exposures, sorted by acquisition time, to match them
             # up with the acquired images:
-            self.exposures.sort(order='t')
-            for image, exposure in zip(self.images, self.exposures):
+            exposures.sort(order='t')
+            if frame_info is None:
+                frame_info = [(i, np.nan) for i in range(len(images_acquired))]
+            # (sequence number, timestamp) of each saved frame
+            image_info = {key: [] for key in images}
+            # The sequence number is the frame's index in the acquisition, which
+            # skips the frames that were dropped
+            for image, (sequence, timestamp) in zip(images_acquired, frame_info):
+                if sequence >= len(exposures):
+                    continue
+                exposure = exposures[sequence]
                 images[(exposure['name'], exposure['frametype'])].append(image)
+                image_info[(exposure['name'], exposure['frametype'])].append((sequence, timestamp))
 
             # Save images to the HDF5 file:
             for (name, frametype), imagelist in images.items():
                 data = imagelist[0] if len(imagelist) == 1 else np.array(imagelist)
                 self.logger.debug(f"Saving frame(s) {name}/{frametype}.")
                 group = image_group.require_group(name)
-                dset = group.create_dataset(
-                    frametype, data=data, dtype='uint16', compression='gzip'
-                )
+                chunks = None
+                if imagelist:
+                    # one chunk per frame
+                    frame_shape = imagelist[0].shape
+                    chunks = frame_shape if data.ndim == 2 else (1,) + frame_shape
+                if subtract and imagelist:
+                    data = data.astype(np.float32) - dark_frame.frame
+                    dset = group.create_dataset(frametype, data=data, chunks=chunks, **storage)
+                else:
+                    dset = group.create_dataset(
+                        frametype, data=data, dtype='uint16', chunks=chunks, **storage
+                    )
                 # Specify this dataset should be viewed as an image
                 dset.attrs['CLASS'] = np.string_('IMAGE')
                 dset.attrs['IMAGE_VERSION'] = np.string_('1.2')
                 dset.attrs['IMAGE_SUBCLASS'] = np.string_('IMAGE_GRAYSCALE')
                 dset.attrs['IMAGE_WHITE_IS_ZERO'] = np.uint8(0)
+                info = image_info[(name, frametype)]
+                dset.attrs['frame_sequence_numbers'] = np.array([i[0] for i in info], dtype=int)
+                dset.attrs['frame_timestamps'] = np.array([i[1] for i in info], dtype=float)
+
+                if frame_processing and imagelist:
+                    # on the raw counts the thresholds are set for
+                    raw = np.array(imagelist) if subtract else data
+                    frame_results[_decode_key(name, frametype)] = process_frames(
+                        raw if raw.ndim == 3 else raw[np.newaxis], frame_processing
+                    )
+                if accumulator is not None and imagelist:
+                    accumulator.add(_decode_key(name, frametype), data, run_number)
+
+            if kinetic_series is not None:
+                self.logger.debug(f"Saving kinetic series {sorted(kinetic_keys)}.")
+                kinetic_results = {}
+                def on_frame(key, frame):
+                    if accumulator is not None:
+                        accumulator.add(key, frame - dark_frame.frame if subtract else frame, run_number)
+                    if not frame_processing:
+                        return
+                    results = process_frames(frame[np.newaxis], frame_processing)
+                    for result, value in results.items():
+                        kinetic_results.setdefault(key, {}).setdefault(result, []).append(value[0])
+                kinetic_series.save_into(
+                    image_group, storage,
+                    on_frame if frame_processing or accumulator is not None else None,
+                    dark_frame.frame if subtract else None,
+                )
+                kinetic_series.close()
+                for key, results in kinetic_results.items():
+                    frame_results[key] = {k: np.array(v) for k, v in results.items()}
+
+            if frame_results:
+                self._save_frame_results(f, frame_results, frame_processing)
 
             # Save camera settings to hdf5 file - added by Shungo, 02/25/2025
-            cam_data = self.camera.get_cam_data()
-            f.create_dataset('/data/cam_info/detectorTemp', data=cam_data[0])
+            dset = f.create_dataset('/data/cam_info/detectorTemp', data=cam_data[0])
+            dset.attrs['age'] = temperature_age # seconds since it was read
             f.create_dataset('/data/cam_info/rawEMGain', data=cam_data[1])
             f.create_dataset('/data/cam_info/calibratedEmGain', data=cam_data[2])
             f.create_dataset('/data/cam_info/exposureTime', data=cam_data[3])
             f.create_dataset('/data/cam_info/currentReadoutMode', data=cam_data[4]) #(0=nothing, 1=EM, 2=CONV).
-
-
-
+            if latency is not None:
+                # per-frame latency histograms of this shot, see latency.py
+                latency.save(f.create_group('/data/cam_info/latency'))
+
+        if telemetry is not None:
+            # the shot is saved already, a log that cannot be opened must not fail it
+            try:
+                self.telemetry.append(telemetry)
+            except Exception:
+                self.logger.exception("Failed to append to the telemetry log")
+
+        if accumulator is not None:
+            if n_runs is not None and run_number == n_runs - 1:
+                # last shot of the sequence
+                accumulator.flush()
+            else:
+                accumulator.maybe_flush()
 
         # If the images are all the same shape, send them to the GUI for display:
+        if not images_acquired and kinetic_series is not None and kinetic_series.last_frame is not None:
+            images_acquired = [kinetic_series.last_frame]
         try:
-            image_block = np.stack(self.images)
+            image_block = np.stack(images_acquired)
         except ValueError:
             self.logger.debug("Cannot display images in the GUI, they are not all the same shape")
         else:
             self._send_image_to_parent(image_block)
 
-        self.images = None
-        self.n_images = None
-        self.attributes_to_save = None
-        self.exposures = None
-        self.h5_filepath = None
-        self.stop_acquisition_timeout = None
-        self.exception_on_failed_shot = None
-        return True
+        self._release_images(images_acquired)
+
+    def transition_to_buffered(self, device_name, h5_filepath, initial_values, fresh):
+        # The previous shot's frames must be written before the frame ring is reused
+        self._flush_images()
+        self._manual_done = False
+        # set again by set_attributes_smart if this shot's camera_attributes have it
+        self.frame_processing = None
+        # looked up once set_attributes_smart has programmed the shot's attributes
+        self.dark_frame = None
+        self._dark_frame_pending = self.dark_subtraction is not None
+        if self.kinetic_mode:
+            with h5py.File(h5_filepath, 'r') as f:
+                group = f['devices'][self.device_name]
+                if 'EXPOSURES' in group:
+                    series = KineticSeries(group['EXPOSURES'][:])
+                    if series:
+                        self.kinetic_series = series
+                        self.camera.frame_sink = series
+        if fresh:
+            # super() only clears smart_cache, this makes the reprogramming full
+            self.camera.applied_attributes = {}
+        try:
+            return super().transition_to_buffered(device_name, h5_filepath, initial_values, fresh)
+        finally:
+            # not consumed if the shot has no exposures for this camera
+            self._dark_frame_pending = False
+
+    def _discard_kinetic_series(self):
+        self.camera.frame_sink = None
+        if self.kinetic_series is not None:
+            self.kinetic_series.close()
+            self.kinetic_series = None
 
     def transition_to_manual(self):
         self.logger.debug("Setting manual mode camera attributes.\n")
@@ -272,7 +826,31 @@ class NuvuCameraWorker(IMAQdxCameraWorker):
             # If continuous manual mode acquisition was in progress before the bufferd
             # run, resume it:
             self.start_continuous(self.continuous_dt)
+        self._manual_done = True
+        # If post_experiment already handed off this shot's images, they must be
+        # on disk before the shot file is released
+        self._flush_images()
         return True
+
+    def abort(self):
+        try:
+            self._flush_images()
+        except Exception as e:
+            self.logger.debug(f"Image writer error during abort: {e}")
+        self._manual_done = True
+        result = super().abort()
+        # after the acquisition thread has stopped writing to it
+        self._discard_kinetic_series()
+        return result
+
+    def shutdown(self):
+        try:
+            self._flush_images()
+            if self.accumulator is not None:
+                self.accumulator.flush()
+        finally:
+            self.image_writer.close()
+            super().shutdown()
     
     # function used to close the camera when it is running and the restart button is pressed. it is crucial to
     # always close the camera before trying to re-establish connection to it
@@ -0,0 +1,168 @@
+#####################################################################
+#                                                                   #
+# /NuvuCamera/dark_frames.py                                        #
+#                                                                   #
+# Master dark frames, taken with the shutter closed at a shot's     #
+# exposure and readout settings so they hold its bias and dark      #
+# current, keyed by those settings, for subtraction in the worker   #
+# or at analysis time.                                              #
+#                                                                   #
+#####################################################################
+
+import os
+import time
+
+import numpy as np
+import h5py
+
+# group of the library file holding the master frames
+LIBRARY_GROUP = 'dark_frames'
+# image group entry linking a shot to the master frame it was taken with
+LINK_NAME = 'dark_frame'
+
+
+class DarkFrame(object):
+    """One master frame: the float32 mean of n_frames shutter-closed frames."""
+    def __init__(self, key, frame, acquired, n_frames, detector_temp, name=None):
+        self.key = key
+        self.frame = frame
+        self.acquired = acquired
+        self.n_frames = n_frames
+        self.detector_temp = detector_temp
+        # dataset name in the library file, None if it is only held in memory
+        self.name = name
+
+    def age(self):
+        return time.time() - self.acquired
+
+    def describe(self):
+        """Image group attributes recording which master frame a shot used."""
+        readout_mode, em_gain, binning, roi, exposure_time, band = self.key
+        return {
+            'dark_frame_readout_mode': readout_mode,
+            'dark_frame_em_gain': em_gain,
+            'dark_frame_binning': binning,
+            'dark_frame_roi': roi,
+            'dark_frame_exposure_time': exposure_time,
+            'dark_frame_detector_temp': self.detector_temp,
+            'dark_frame_acquired': self.acquired,
+            'dark_frame_n_frames': self.n_frames,
+        }
+
+
+class DarkFrameLibrary(object):
+    """Master dark frames keyed by readout mode, calibrated EM gain, binning,
+    ROI, exposure time and detector temperature band.
+
+    With a path, every master frame is also written to that HDF5 file as
+    /dark_frames/<name> and never overwritten, so shots can link to the exact
+    frame they were taken with. The file is read back on start-up, keeping
+    the newest frame per key; frames are loaded when first needed.
+    """
+    def __init__(self, path=None, max_age=3600.0, temperature_band=2.0):
+        self.path = os.path.abspath(path) if path is not None else None
+        self.max_age = max_age
+        self.temperature_band = temperature_band
+        self.frames = {}
+        if self.path is not None and os.path.exists(self.path):
+            self._load_index()
+
+    def key(self, cam_info):
+        """Library key for the camera state in cam_info (NuvuCamUtils.cam_info)."""
+        band = int(round(cam_info['componentTemp']['detectorTemp'] / self.temperature_band))
+        return (
+            int(cam_info['currentReadoutMode']),
+            round(float(cam_info['calibratedEmGain']), 2),
+            tuple(int(v) for v in cam_info['binning']),
+            tuple(int(v) for v in cam_info['roi']),
+            round(float(cam_info['exposureTime']), 6),
+            band,
+        )
+
+    def _load_index(self):
+        with h5py.File(self.path, 'r') as f:
+            if LIBRARY_GROUP not in f:
+                return
+            for name, dset in f[LIBRARY_GROUP].items():
+                a = dset.attrs
+                key = (
+                    int(a['readout_mode']), float(a['em_gain']),
+                    tuple(int(v) for v in a['binning']), tuple(int(v) for v in a['roi']),
+                    float(a['exposure_time']), int(a['temperature_band']),
+                )
+                if key in self.frames and self.frames[key].acquired >= a['acquired']:
+                    continue
+                self.frames[key] = DarkFrame(
+                    key, None, float(a['acquired']), int(a['n_frames']),
+                    float(a['detector_temp']), name,
+                )
+
+    def lookup(self, key):
+        """The newest master frame for key, or None."""
+        dark = self.frames.get(key)
+        if dark is not None and dark.frame is None:
+            with h5py.File(self.path, 'r') as f:
+                dark.frame = f[LIBRARY_GROUP][dark.name][:]
+        return dark
+
+    def is_stale(self, dark):
+        return self.max_age is not None and dark.age() > self.max_age
+
+    def add(self, key, frame, n_frames, detector_temp):
+        """Store a newly acquired master frame for key and return it."""
+        dark = DarkFrame(key, frame.astype(np.float32), time.time(), n_frames, detector_temp)
+        if self.path is not None:
+            readout_mode, em_gain, binning, roi, exposure_time, band = key
+            dark.name = time.strftime('%Y%m%dT%H%M%S', time.localtime(dark.acquired)) + (
+                f'_mode{readout_mode}_gain{em_gain:g}_bin{binning[0]}x{binning[1]}'
+                f'_exp{exposure_time:g}ms'
+            )
+            with h5py.File(self.path, 'a') as f:
+                group = f.require_group(LIBRARY_GROUP)
+                if dark.name in group:
+                    # two frames with the same settings within a second
+                    dark.name += f'_{len(group)}'
+                dset = group.create_dataset(dark.name, data=dark.frame, compression='gzip')
+                dset.attrs['readout_mode'] = readout_mode
+                dset.attrs['em_gain'] = em_gain
+                dset.attrs['binning'] = binning
+                dset.attrs['roi'] = roi
+                dset.attrs['exposure_time'] = exposure_time
+                dset.attrs['temperature_band'] = band
+                dset.attrs['detector_temp'] = detector_temp
+                dset.attrs['acquired'] = dark.acquired
+                dset.attrs['n_frames'] = n_frames
+        self.frames[key] = dark
+        return dark
+
+    def link(self, image_group, dark):
+        """Record dark in a shot's image group: its settings as attributes and,
+        if it is in the library file, an external link to it."""
+        for name, value in dark.describe().items():
+            image_group.attrs[name] = value
+        if dark.name is not None:
+            image_group.attrs['dark_frame_library'] = self.path
+            image_group[LINK_NAME] = h5py.ExternalLink(self.path, f'/{LIBRARY_GROUP}/{dark.name}')
+
+
+def load_dark_frame(image_group):
+    """The master dark frame linked from a shot's image group (e.g.
+    f['images/camera']), or None if the shot has none or the library file
+    cannot be found."""
+    try:
+        return image_group[LINK_NAME][:]
+    except KeyError:
+        return None
+
+
+def dark_corrected(image_group, frames):
+    """frames as float32 with the shot's master dark frame subtracted, unless
+    the worker already subtracted it. Raises KeyError if the shot was saved
+    raw and no master dark frame can be found for it."""
+    frames = np.asarray(frames, dtype=np.float32)
+    if image_group.attrs.get('dark_subtraction') == 'worker':
+        return frames
+    dark = load_dark_frame(image_group)
+    if dark is None:
+        raise KeyError(f"no master dark frame linked from {image_group.name}")
+    return frames - dark
@@ -0,0 +1,86 @@
+#####################################################################
+#                                                                   #
+# /NuvuCamera/frame_processing.py                                   #
+#                                                                   #
+# Per-exposure reductions computed by NuvuCameraWorker so routine   #
+# scans do not need the raw frames downstream.                      #
+#                                                                   #
+#####################################################################
+
+import numpy as np
+
+# camera_attributes entry holding the configuration, e.g.
+#
+#   "frame_processing": {
+#       "threshold": 1690,                  # photon counting threshold (counts)
+#       "rois": {"beam": [200, 320, 0, 512]},
+#       "background_roi": [0, 100, 0, 512],
+#   }
+#
+# ROIs are [row_start, row_stop, col_start, col_stop] in array indices of the
+# saved image.
+CONFIG_KEY = 'frame_processing'
+_ALLOWED_KEYS = {'threshold', 'rois', 'background_roi'}
+
+
+def _check_roi(name, roi):
+    if len(roi) != 4 or not all(isinstance(v, (int, np.integer)) for v in roi):
+        raise ValueError(f"{CONFIG_KEY}: ROI {name} must be 4 ints "
+                         f"[row_start, row_stop, col_start, col_stop], got {roi!r}")
+    if roi[0] >= roi[1] or roi[2] >= roi[3]:
+        raise ValueError(f"{CONFIG_KEY}: ROI {name} is empty: {roi!r}")
+
+
+def validate_config(config):
+    """Raise ValueError if the frame_processing entry is malformed."""
+    if config is None:
+        return
+    unknown = set(config) - _ALLOWED_KEYS
+    if unknown:
+        raise ValueError(f"{CONFIG_KEY}: unknown keys {sorted(unknown)}, "
+                         f"allowed are {sorted(_ALLOWED_KEYS)}")
+    for name, roi in config.get('rois', {}).items():
+        _check_roi(name, roi)
+    if config.get('background_roi') is not None:
+        _check_roi('background_roi', config['background_roi'])
+
+
+def _roi(frames, roi):
+    r0, r1, c0, c1 = roi
+    return frames[:, r0:r1, c0:c1]
+
+
+def process_frames(frames, config):
+    """Reduce a [frames, rows, cols] stack to per-frame scalars.
+
+    Returns {result_name: array with one value per frame}:
+        threshold_count, threshold_fraction   pixels above threshold (the
+                                              fraction is np.mean(frame > threshold))
+        background_mean                       mean counts per pixel in background_roi
+        <roi>_sum                             summed counts in the ROI
+        <roi>_sum_bgsub                       <roi>_sum - background_mean * ROI pixels
+        <roi>_threshold_count                 pixels above threshold in the ROI
+    """
+    frames = np.asarray(frames)
+    results = {}
+    threshold = config.get('threshold')
+    if threshold is not None:
+        counts = np.count_nonzero(frames > threshold, axis=(1, 2))
+        results['threshold_count'] = counts
+        results['threshold_fraction'] = counts / (frames.shape[1] * frames.shape[2])
+
+    background_mean = None
+    if config.get('background_roi') is not None:
+        background_mean = _roi(frames, config['background_roi']).mean(axis=(1, 2))
+        results['background_mean'] = background_mean
+
+    for name, roi in config.get('rois', {}).items():
+        region = _roi(frames, roi)
+        sums = region.sum(axis=(1, 2), dtype=np.int64)
+        results[f'{name}_sum'] = sums
+        if background_mean is not None:
+            n_pixels = region.shape[1] * region.shape[2]
+            results[f'{name}_sum_bgsub'] = sums - background_mean * n_pixels
+        if threshold is not None:
+            results[f'{name}_threshold_count'] = np.count_nonzero(region > threshold, axis=(1, 2))
+    return results
@@ -0,0 +1,59 @@
+#####################################################################
+#                                                                   #
+# /NuvuCamera/image_writer.py                                       #
+#                                                                   #
+# Background thread that saves shot images to HDF5 and sends the   #
+# GUI preview, so post_experiment only has to hand frames off.      #
+#                                                                   #
+#####################################################################
+
+import queue
+import threading
+
+
+class ImageWriter(object):
+    """Runs submitted jobs one at a time, in order, on a daemon thread.
+
+    submit() blocks once max_pending jobs are waiting, so a slow disk holds
+    up the next hand-off instead of piling up frames in memory. flush() is
+    the barrier: it returns when every submitted job has finished, and
+    re-raises the first error a job raised since the last flush.
+    """
+    def __init__(self, logger, max_pending=2):
+        self.logger = logger
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, function, *args):
+        self._queue.put((function, args))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                function, args = item
+                function(*args)
+            except Exception as e:
+                self.logger.exception("Image writer job failed")
+                if self._error is None:
+                    self._error = e
+            finally:
+                self._queue.task_done()
+
+    @property
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def flush(self):
+        self._queue.join()
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
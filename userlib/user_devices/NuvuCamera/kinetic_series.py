@@ -0,0 +1,142 @@
+#####################################################################
+#                                                                   #
+# /NuvuCamera/kinetic_series.py                                     #
+#                                                                   #
+# Kinetic mode: frames of exposures sharing a name and frametype    #
+# are written to disk as they arrive instead of being held until    #
+# the end of the shot.                                              #
+#                                                                   #
+#####################################################################
+
+import os
+import tempfile
+
+import numpy as np
+import h5py
+
+
+class KineticSeries(object):
+    """Scratch HDF5 file holding one [n_frames, h, w] dataset per (name,
+    frametype) that has more than one exposure.
+
+    add() is called from the acquisition thread with each frame and writes it
+    to its slot (an uncompressed chunk, so the acquisition loop only pays for
+    a copy), after which the frame can go back to the frame ring. save_into()
+    is called from the image writer and copies the series into the shot
+    file, compressing frame by frame, with per-frame timestamps and exposure
+    indices. Frames never acquired (dropped, or the shot ended early) are not
+    copied: they are marked False in the frame_written attribute and read
+    back as the dataset's fill value, 0 or NaN, with a NaN timestamp.
+    """
+    def __init__(self, exposures, directory=None):
+        # exposure index = position in the EXPOSURES table sorted by time,
+        # which is also the frame's sequence number in the acquisition
+        exposures = np.sort(exposures, order='t')
+        keys = [
+            tuple(v.decode() if isinstance(v, bytes) else v for v in (e['name'], e['frametype']))
+            for e in exposures
+        ]
+        counts = {}
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+        self.indices = {key: [] for key in counts if counts[key] > 1}
+        self.slots = {}
+        for index, key in enumerate(keys):
+            if key in self.indices:
+                self.slots[index] = (key, len(self.indices[key]))
+                self.indices[key].append(index)
+        self.n_frames = len(self.slots)
+        # which positions of each series add() has written
+        self.written = {
+            key: np.zeros(len(indices), dtype=bool) for key, indices in self.indices.items()
+        }
+        self.frames_written = 0
+        # (key, position) of the frame add() wrote last, and that frame once
+        # save_into() has read it back, for the preview
+        self._last_slot = None
+        self.last_frame = None
+        self._directory = directory
+        self._file = None
+        self._path = None
+
+    def __bool__(self):
+        return self.n_frames > 0
+
+    def _open(self, frame_shape):
+        fd, self._path = tempfile.mkstemp(prefix='nuvu_kinetic_', suffix='.h5', dir=self._directory)
+        os.close(fd)
+        self._file = h5py.File(self._path, 'w')
+        for (name, frametype), indices in self.indices.items():
+            group = self._file.require_group(name)
+            group.create_dataset(
+                frametype, shape=(len(indices),) + frame_shape, dtype='uint16',
+                chunks=(1,) + frame_shape,
+            )
+            group.create_dataset(
+                frametype + '_timestamps', data=np.full(len(indices), np.nan)
+            )
+
+    def add(self, image, sequence, timestamp):
+        """Write the frame if its exposure belongs to the series. Returns
+        whether it did; the caller keeps frames that were not written."""
+        if sequence not in self.slots:
+            return False
+        if self._file is None:
+            self._open(image.shape)
+        (name, frametype), position = self.slots[sequence]
+        group = self._file[name]
+        group[frametype][position] = image
+        group[frametype + '_timestamps'][position] = timestamp
+        self.written[(name, frametype)][position] = True
+        self.frames_written += 1
+        self._last_slot = ((name, frametype), position)
+        return True
+
+    def save_into(self, image_group, storage, on_frame=None, dark=None):
+        """Copy the series into image_group/<name>/<frametype>, compressed with
+        the h5py filter options in storage. on_frame(key, frame) is called
+        with each raw frame as it is copied, skipping frames never acquired.
+        If dark is given, frames are saved as float32 with it subtracted and
+        frames never acquired read back as NaN."""
+        for (name, frametype), indices in self.indices.items():
+            group = image_group.require_group(name)
+            timestamps = np.full(len(indices), np.nan)
+            if self._file is not None:
+                source = self._file[name][frametype]
+                timestamps = self._file[name][frametype + '_timestamps'][:]
+                frame_shape = source.shape[1:]
+            else:
+                # no frame arrived, nothing tells the frame shape
+                source = None
+                frame_shape = (0, 0)
+            written = self.written[(name, frametype)]
+            dset = group.create_dataset(
+                frametype, shape=(len(indices),) + frame_shape,
+                dtype='uint16' if dark is None else 'float32',
+                chunks=(1,) + frame_shape if source is not None else None,
+                fillvalue=0 if dark is None else np.nan, **storage
+            )
+            if source is not None:
+                for position in np.flatnonzero(written):
+                    frame = source[position]
+                    if ((name, frametype), position) == self._last_slot:
+                        self.last_frame = frame
+                    dset[position] = frame if dark is None else frame - dark
+                    if on_frame is not None:
+                        on_frame((name, frametype), frame)
+            dset.attrs['CLASS'] = np.string_('IMAGE')
+            dset.attrs['IMAGE_VERSION'] = np.string_('1.2')
+            dset.attrs['IMAGE_SUBCLASS'] = np.string_('IMAGE_GRAYSCALE')
+            dset.attrs['IMAGE_WHITE_IS_ZERO'] = np.uint8(0)
+            dset.attrs['frame_exposure_indices'] = np.array(indices, dtype=int)
+            dset.attrs['frame_timestamps'] = timestamps
+            dset.attrs['frame_written'] = written
+
+    def close(self):
+        """Close and delete the scratch file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._path is not None:
+            os.remove(self._path)
+            self._path = None
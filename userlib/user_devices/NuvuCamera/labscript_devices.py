@@ -10,7 +10,141 @@
 # the project for the full license.                                 #
 #                                                                   #
 #####################################################################
+from labscript import LabscriptError, set_passed_properties
 from labscript_devices.IMAQdxCamera.labscript_devices import IMAQdxCamera
 
 class NuvuCamera(IMAQdxCamera):
-    description = "Nuvu scientific camera"
\ No newline at end of file
+    description = "Nuvu scientific camera"
+
+    @set_passed_properties(
+        property_names={
+            "connection_table_properties": [
+                "image_compression",
+                "preview_rate",
+                "preview_downsample",
+                "nb_buffers",
+                "kinetic_mode",
+                "dark_subtraction",
+                "dark_library_path",
+                "dark_max_age",
+                "dark_n_frames",
+                "dark_temperature_band",
+                "accumulate",
+                "accumulate_flush_interval",
+                "telemetry_path",
+                "telemetry_interval",
+            ],
+        }
+    )
+    def __init__(self, *args, image_compression='gzip', preview_rate=10.0,
+                 preview_downsample=1, nb_buffers=4, kinetic_mode=False,
+                 dark_subtraction=None, dark_library_path=None, dark_max_age=3600.0,
+                 dark_n_frames=20, dark_temperature_band=2.0, accumulate=False,
+                 accumulate_flush_interval=10.0, telemetry_path=None,
+                 telemetry_interval=60.0, **kwargs):
+        """As IMAQdxCamera, plus:
+
+            image_compression (str or None), default: `'gzip'`
+                HDF5 filter for saved images: 'gzip' (level 4), 'gzip1' (level 1,
+                faster), 'lzf' (fastest, h5py only) or None. Images are chunked one
+                frame per chunk.
+
+            preview_rate (float), default: `10.0`
+                Max frames/s sent to the GUI in continuous (manual) acquisition.
+                The camera keeps acquiring at its own rate; frames the GUI cannot
+                keep up with are dropped from the preview.
+
+            preview_downsample (int), default: `1`
+                Keep every nth row and column of continuous preview frames.
+
+            nb_buffers (int), default: `4`
+                Frame buffers the SDK allocates. Frames are read from them oldest
+                first; a kinetic series faster than the readout loop can empty
+                them needs more. Overwritten frames are counted in the shot's
+                dropped_frames image group attribute.
+
+            kinetic_mode (bool), default: `False`
+                Write the frames of exposures sharing a name and frametype to a
+                scratch file as they arrive, and copy them into a [n_frames, h, w]
+                dataset (one chunk per frame) after the shot, with per-frame
+                frame_timestamps, frame_exposure_indices and frame_written
+                attributes; frames never acquired are False in frame_written
+                and left out of frame processing and accumulation. Long series
+                then do not have to be held in memory until the end of the shot.
+
+            dark_subtraction (str or None), default: `None`
+                Use master dark frames: the mean of dark_n_frames frames taken with
+                the shutter closed at the shot's readout mode, EM gain, binning,
+                ROI and exposure time, so subtracting one removes the bias and
+                the dark current accumulated over the exposure. They are taken
+                at transition_to_buffered when none exists for those settings
+                and detector temperature band or it is older than dark_max_age,
+                and on demand from the tab. 'worker' saves frames as float32
+                with the master frame subtracted; 'analysis' saves raw frames
+                and links the shot to the master frame, see
+                dark_frames.dark_corrected().
+
+            dark_library_path (str or None), default: `None`
+                HDF5 file the master frames are kept in, shared by all shots and
+                read back when BLACS starts. Required for 'analysis'; with None
+                master frames are only kept in memory.
+
+            dark_max_age (float or None), default: `3600.0`
+                Seconds after which a master frame is taken again, None to keep
+                master frames until refreshed from the tab.
+
+            dark_n_frames (int), default: `20`
+                Frames averaged into a master frame.
+
+            dark_temperature_band (float), default: `2.0`
+                Width in degrees C of the detector temperature bands master
+                frames are keyed by.
+
+            accumulate (bool), default: `False`
+                Keep a running sum, sum of squares and frame count of the saved
+                frames per exposure name and frametype over each sequence, and
+                write them with the mean and standard deviation images to
+                <sequence_id>_<device_name>_accumulated.h5 next to the shot
+                files, see accumulator.load_accumulated().
+
+            accumulate_flush_interval (float), default: `10.0`
+                Minimum seconds between rewrites of the sidecar file. It is
+                always written after the last shot of a sequence.
+
+            telemetry_path (str or None), default: `None`
+                HDF5 file to append camera telemetry to: detector, controller,
+                power supply and FPGA temperatures, EM gain, exposure time and
+                readout mode, with a timestamp and the shot file name. One row
+                is added per shot and, between shots, at most one every
+                telemetry_interval seconds. See telemetry.load_telemetry().
+
+            telemetry_interval (float), default: `60.0`
+                Minimum seconds between telemetry rows recorded between shots.
+        """
+        if image_compression not in ('gzip', 'gzip1', 'lzf', None):
+            raise LabscriptError(
+                f"image_compression must be 'gzip', 'gzip1', 'lzf' or None, got {image_compression!r}"
+            )
+        if float(preview_rate) <= 0 or int(preview_downsample) < 1:
+            raise LabscriptError(
+                f"preview_rate must be > 0 and preview_downsample >= 1, got "
+                f"{preview_rate!r} and {preview_downsample!r}"
+            )
+        if int(nb_buffers) < 1:
+            raise LabscriptError(f"nb_buffers must be >= 1, got {nb_buffers!r}")
+        if dark_subtraction not in ('worker', 'analysis', None):
+            raise LabscriptError(
+                f"dark_subtraction must be 'worker', 'analysis' or None, got {dark_subtraction!r}"
+            )
+        if dark_subtraction == 'analysis' and dark_library_path is None:
+            raise LabscriptError("dark_subtraction='analysis' needs a dark_library_path")
+        if int(dark_n_frames) < 1 or float(dark_temperature_band) <= 0:
+            raise LabscriptError(
+                f"dark_n_frames must be >= 1 and dark_temperature_band > 0, got "
+                f"{dark_n_frames!r} and {dark_temperature_band!r}"
+            )
+        if float(accumulate_flush_interval) < 0:
+            raise LabscriptError(
+                f"accumulate_flush_interval must be >= 0, got {accumulate_flush_interval!r}"
+            )
+        IMAQdxCamera.__init__(self, *args, **kwargs)
\ No newline at end of file
@@ -0,0 +1,102 @@
+#####################################################################
+#                                                                   #
+# /NuvuCamera/latency.py                                            #
+#                                                                   #
+# Fixed-size latency histograms for the stages every buffered       #
+# frame goes through on its way from the driver to the worker.      #
+#                                                                   #
+#####################################################################
+
+import math
+
+import numpy as np
+
+# read_interval: end of read() of the previous frame to that of this one,
+#     the frame arrival period plus its jitter
+# read_to_copy: end of read() to the frame copied into the frame ring
+# copy_to_handoff: copied to kept for saving, or written by the frame sink
+# All are time.perf_counter() differences: time.time() ticks every ~15.6 ms
+# on Windows and can step backwards. The SDK's per-frame host timestamp is
+# not compared with them: its units and epoch are not documented, so it is
+# only saved with the frames.
+STAGES = ('read_interval', 'read_to_copy', 'copy_to_handoff')
+
+
+class LatencyHistograms(object):
+    """Log-spaced histogram of latencies per stage, bins_per_decade bins per
+    decade from min_latency up to min_latency * 10**decades seconds, with the
+    first and last bins also counting everything below and above.
+
+    record() is a log10 and an increment, cheap enough for every frame.
+    """
+    def __init__(self, min_latency=1e-6, decades=7, bins_per_decade=10):
+        self.min_latency = min_latency
+        self.bins_per_decade = bins_per_decade
+        self.n_bins = decades * bins_per_decade
+        self.bin_edges = min_latency * 10 ** (np.arange(self.n_bins + 1) / bins_per_decade)
+        self.counts = {stage: np.zeros(self.n_bins, dtype=np.int64) for stage in STAGES}
+        self.total = {stage: 0.0 for stage in STAGES}
+        self.max = {stage: 0.0 for stage in STAGES}
+
+    def record(self, stage, seconds):
+        if seconds > self.min_latency:
+            i = min(int(math.log10(seconds / self.min_latency) * self.bins_per_decade),
+                    self.n_bins - 1)
+        else:
+            i = 0
+        self.counts[stage][i] += 1
+        self.total[stage] += seconds
+        if seconds > self.max[stage]:
+            self.max[stage] = seconds
+
+    def merge(self, other):
+        """Add the counts of other, which must have the same bins."""
+        for stage in STAGES:
+            self.counts[stage] += other.counts[stage]
+            self.total[stage] += other.total[stage]
+            self.max[stage] = max(self.max[stage], other.max[stage])
+
+    def percentile(self, stage, q):
+        """Upper edge of the bin holding the q-th percentile, in seconds, or
+        the largest latency recorded if that is smaller."""
+        counts = self.counts[stage]
+        n = counts.sum()
+        if not n:
+            return np.nan
+        i = np.searchsorted(np.cumsum(counts), q / 100 * n)
+        return min(self.bin_edges[i + 1], self.max[stage])
+
+    def summary(self):
+        """{stage: {'count', 'mean', 'p50', 'p99', 'max'}}, times in seconds."""
+        summary = {}
+        for stage in STAGES:
+            count = int(self.counts[stage].sum())
+            summary[stage] = {
+                'count': count,
+                'mean': self.total[stage] / count if count else np.nan,
+                'p50': self.percentile(stage, 50),
+                'p99': self.percentile(stage, 99),
+                'max': self.max[stage],
+            }
+        return summary
+
+    def save(self, group):
+        """Write bin_edges and one counts dataset per stage, with the summary
+        as its attributes, into the HDF5 group."""
+        group.create_dataset('bin_edges', data=self.bin_edges)
+        for stage, values in self.summary().items():
+            dset = group.create_dataset(stage, data=self.counts[stage])
+            for key, value in values.items():
+                dset.attrs[key] = value
+
+
+def format_summary(summary):
+    """Text table of a LatencyHistograms.summary(), times in ms."""
+    lines = [f"{'stage':<16s}{'frames':>8s}{'mean':>10s}{'p50':>10s}{'p99':>10s}{'max':>10s}"]
+    for stage, s in summary.items():
+        lines.append(
+            f"{stage:<16s}{s['count']:>8d}" + ''.join(
+                f"{1e3 * s[key]:>10.3f}" for key in ('mean', 'p50', 'p99', 'max')
+            )
+        )
+    return '\n'.join(lines)
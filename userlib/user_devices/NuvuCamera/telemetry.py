@@ -0,0 +1,77 @@
+#####################################################################
+#                                                                   #
+# /NuvuCamera/telemetry.py                                          #
+#                                                                   #
+# Append-only log of camera temperatures, gain and readout          #
+# settings, one row per shot and per slow poll between shots.       #
+#                                                                   #
+#####################################################################
+
+import threading
+import time
+
+import numpy as np
+import h5py
+
+DATASET = 'telemetry'
+# rows per chunk of the telemetry dataset
+CHUNK_ROWS = 1024
+
+row_dtype = np.dtype([
+    ('time', float),            # unix time the row was recorded
+    ('shot', h5py.special_dtype(vlen=str)),  # shot file name, '' between shots
+    ('detectorTemp', float),
+    ('controllerTemp', float),
+    ('powerSupplyTemp', float),
+    ('fpgaTemp', float),
+    ('temperature_age', float),  # s since the temperatures were read
+    ('rawEmGain', float),
+    ('calibratedEmGain', float),
+    ('exposureTime', float),
+    ('readoutMode', int),
+])
+
+
+def telemetry_row(cam_info, temperature_age, shot=''):
+    """A row_dtype row from the cached camera state (NuvuCamUtils.cam_info)."""
+    temps = cam_info['componentTemp']
+    return np.array([(
+        time.time(), shot,
+        temps['detectorTemp'], temps['controllerTemp'], temps['powerSupplyTemp'],
+        temps['fpgaTemp'], temperature_age,
+        cam_info['rawEmGain'], cam_info['calibratedEmGain'],
+        cam_info['exposureTime'], cam_info['currentReadoutMode'],
+    )], dtype=row_dtype)
+
+
+def load_telemetry(path):
+    """The whole log as a structured array with row_dtype fields."""
+    with h5py.File(path, 'r') as f:
+        rows = f[DATASET][:]
+    # h5py reads vlen strings inside compound types back as bytes
+    rows['shot'] = [v.decode() if isinstance(v, bytes) else v for v in rows['shot']]
+    return rows
+
+
+class TelemetryLog(object):
+    """One resizable, chunked compound dataset that rows are appended to.
+
+    The file is only open while a row is written, so it can be read (or
+    copied away) at any time, and appends from the worker and the image
+    writer threads are serialised by a lock.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, row):
+        with self._lock, h5py.File(self.path, 'a') as f:
+            if DATASET not in f:
+                f.create_dataset(
+                    DATASET, shape=(0,), maxshape=(None,), dtype=row_dtype,
+                    chunks=(CHUNK_ROWS,), compression='gzip',
+                )
+            dset = f[DATASET]
+            n = len(dset)
+            dset.resize((n + len(row),))
+            dset[n:] = row
@@ -25,14 +25,16 @@ class RemoteCommunication:
     {
         "action": <string>,         # The action to be performed (e.g., "PROGRAM_MANUAL", "CHECK_STATUS").
         "connection": <string>,     # The identifier for the connection.
-        "value": <any>              # The value to be programmed (optional, depends on action).
+        "value": <any>,             # The value to be programmed (optional, depends on action).
+        "values": <dict>            # {connection: value} to program (PROGRAM_VALUES only).
     }
 
     Responses:
     {
         "status": <string>,         # Status of the request (e.g., "SUCCESS", "ERROR").
         "message": <string>,        # Error or informational message (optional).
-        "value": <any>              # The value from the remote device (optional, depends on action).
+        "value": <any>,             # The value from the remote device (optional, depends on action).
+        "results": <dict>           # {connection: {"status", "message"}} (PROGRAM_VALUES only).
     }
 
     Example Request:
@@ -47,12 +49,20 @@ class RemoteCommunication:
         "status": "SUCCESS",
         "value": 123.45
     }
+
+    PROGRAM_VALUES sets many connections in one round trip. Its status is
+    "SUCCESS" only if every connection was programmed, and "results" holds
+    each connection's own status. Servers that predate it answer "Invalid
+    action" without "results", after which values are programmed one
+    PROGRAM_VALUE request at a time.
     """
     def __init__(self, host=None, port=None, logger=None, child_connections=None, mock=False):
         self.mock = mock
         self.logger = logger
         self.child_connections = child_connections
         self.connected = False
+        # whether the server handles PROGRAM_VALUES, None until the first try
+        self.batch_supported = None
         # self.req_lock = threading.Lock()
 
         
@@ -74,6 +84,8 @@ class RemoteCommunication:
         self.logger.debug(f"TRYING TO SET UP CONNECTION, tcp://{self.host}:{self.port}")
         
         message = {"action": "HELLO", "connection": None}
+        # may be a different server than last time
+        self.batch_supported = None
         
         response = self.send_request(message)
         if response is None:
@@ -119,6 +131,37 @@ class RemoteCommunication:
         self.logger.debug(f"programming value with message: {message}")
         return self.send_request(message)
 
+    def program_values(self, values):
+        """
+        Programs several connections, in one PROGRAM_VALUES request if the server
+        supports it and one PROGRAM_VALUE request per connection otherwise.
+
+        Args:
+            values (dict): {connection: value} to program.
+
+        Returns:
+            dict: {connection: response} with each connection's status.
+        """
+        if not values:
+            return {}
+        if self.batch_supported is not False:
+            message = {"action": "PROGRAM_VALUES", "connection": None, "values": values}
+            self.logger.debug(f"programming values with message: {message}")
+            response = self.send_request(message)
+            if "results" in response:
+                self.batch_supported = True
+                return response["results"]
+            if self.batch_supported:
+                # a server that handled PROGRAM_VALUES before, failing as a whole
+                return {connection: response for connection in values}
+            self.logger.debug(
+                f"Server does not support PROGRAM_VALUES (got {response}), "
+                "programming one connection at a time"
+            )
+            self.batch_supported = False
+        return {connection: self.program_value(connection, value)
+                for connection, value in values.items()}
+
     def check_remote_value(self, connection):
         message = {"action": "CHECK_VALUE", "connection": connection}
         return self.send_request(message)
@@ -135,6 +178,14 @@ class RemoteCommunication:
             self.dummy_values[connection] = value
             # the corresponding monitor connection should also be updated here
             return json.dumps({"status": "SUCCESS"})
+        elif action == "PROGRAM_VALUES":
+            values = message.get("values")
+            self.logger.debug(f"Programming remote device with manual values: {values}")
+            results = {}
+            for connection, value in values.items():
+                self.dummy_values[connection] = value
+                results[connection] = {"status": "SUCCESS"}
+            return json.dumps({"status": "SUCCESS", "results": results})
         elif action == "CHECK_VALUE":
             return json.dumps({"status": "SUCCESS", "value": self.dummy_values[connection]})
         elif action == "CHECK_MONITOR":
@@ -181,6 +232,17 @@ class RemoteControlWorker(Worker):
         elif response["status"] != "SUCCESS":
             raise Exception('invalid status response from server: ' + str(response["status"]))
 
+    def handle_responses(self, responses):
+        """Like handle_response for the {connection: response} of program_values,
+        raising one exception that lists every connection that failed."""
+        errors = [
+            f'{connection}: {response.get("message", response["status"])}'
+            for connection, response in responses.items()
+            if response["status"] != "SUCCESS"
+        ]
+        if errors:
+            raise Exception('Error response from server: ' + '; '.join(errors))
+
     def check_all_remote_values(self):
         """
         Checks the remote values for ALL child connections to keep the front panel 
@@ -258,10 +320,8 @@ class RemoteControlWorker(Worker):
             self.logger.debug("  → Not connected, skipping PROGRAM_VALUE")
             return {}
 
-        for connection, value in front_panel_values.items():
-            self.remote_comms.logger.debug(f"  → sending PROGRAM_VALUE for {connection}: {value!r}")
-            response = self.remote_comms.program_value(connection, value)
-            self.handle_response(response)
+        responses = self.remote_comms.program_values(dict(front_panel_values))
+        self.handle_responses(responses)
 
         # for connection in self.child_output_connections:
             # response = self.remote_comms.program_value(connection, front_panel_values[connection])
@@ -286,10 +346,10 @@ class RemoteControlWorker(Worker):
 
             table = group['remote_device_operation'][:]
             
-            for connection in table.dtype.names:
-                value = float(table[0][connection]) # must cast `np.float32` to `float` to pass in JSON object
-                response = self.remote_comms.program_value(connection, value)
-                self.handle_response(response)
+            # must cast `np.float32` to `float` to pass in JSON object
+            values = {connection: float(table[0][connection]) for connection in table.dtype.names}
+            responses = self.remote_comms.program_values(values)
+            self.handle_responses(responses)
 
             # After buffered programming, get the values of all remote values before shot execution
             self.initial_monitor_values = self.check_all_remote_values()